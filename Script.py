@@ -1,265 +1,340 @@
-import re
+import argparse
+import contextlib
+import functools
+import glob
+import io
+import json
+import os
 import sys
 
+import ir
+import profiling
+from cache import ResultCache, source_key, source_key_lines
+from core import analyze_chunk, analyze_split, analyze_stream, available_cores, run_analyzers
+from report import format_table, hotspots
 
-def analyze_exponential(code: str) -> str:
-    
-    # Updated patterns to better detect logarithmic loops
-    FOR_LOOP_O_N = r'for\s*\([^)]*(\+\+|--|[\+-]=)[^)]*\)'
-    FOR_LOOP_O_LOGN = r'for\s*\([^)]*(\*=|/=)[^)]*\)'
-    
-    WHILE_LOOP_O_N = r'while\s*\(\s*(\w+)(?:\s*[<>=!]+.*?)?\s*\)'
-    WHILE_LOOP_O_LOGN = r'(\w+)\s*(\*|/)=\s*\d+'
-    
-    max_depth = 0
-    current_depth = 0
-    log_n_detected = False
-    inside_while = False
-    while_variable = None
-    inside_for_loop = False
-
-    for line in code.splitlines():
-        line = line.strip()  # Remove leading/trailing whitespace
-        
-        # Check for for loops
-        for_n_match = re.search(FOR_LOOP_O_N, line)
-        for_log_match = re.search(FOR_LOOP_O_LOGN, line)
-        
-        if for_n_match or for_log_match:
-            current_depth += 1
-            max_depth = max(max_depth, current_depth)
-            inside_for_loop = True
-            
-            # Check if this loop is logarithmic
-            if for_log_match:
-                log_n_detected = True
-        
-        # Detect while loop start
-        elif re.search(WHILE_LOOP_O_N, line):
-            while_match = re.search(WHILE_LOOP_O_N, line)
-            if while_match:
-                while_variable = while_match.group(1)
-                inside_while = True
-                current_depth += 1
-                max_depth = max(max_depth, current_depth)
-        
-        # Check for logarithmic operations inside while loop or for loop
-        if inside_while and while_variable:
-            log_match = re.search(WHILE_LOOP_O_LOGN, line)
-            if log_match and log_match.group(1) == while_variable:
-                log_n_detected = True
-        
-        # Also check for logarithmic operations inside for loop body
-        if inside_for_loop:
-            log_match = re.search(WHILE_LOOP_O_LOGN, line)
-            if log_match:
-                log_n_detected = True
-
-        # Detect block ending - only on closing braces
-        if "}" in line:
-            if current_depth > 0:
-                current_depth -= 1
-                if inside_while and current_depth == 0:
-                    inside_while = False
-                    while_variable = None
-                if inside_for_loop and current_depth == 0:
-                    inside_for_loop = False
-
-    # Decide complexity from max depth
-    if max_depth == 0:
-        return "O(1)"
-    else:
-        time_complexity = ""
-        if max_depth == 1:
-            if log_n_detected:
-                time_complexity = "log N"  # Single logarithmic loop
-            else:
-                time_complexity = "N"     # Single linear loop
-        else:
-            # If logarithmic detected, reduce the power by 1
-            if log_n_detected:
-                if max_depth == 2:
-                    time_complexity = "NLogN"  # N^2 becomes N*LogN when one loop is logarithmic
-                else:
-                    time_complexity = f"N^{max_depth-1}LogN"  # Reduce power by 1 and add LogN
+
+# Files at least this large are memory-mapped instead of read whole
+MAP_THRESHOLD = 1024 * 1024
+
+# With --split, files at least this large are analyzed block by block across the pool
+SPLIT_THRESHOLD = 1024 * 1024
+
+# Extensions picked up when a directory is given in batch mode
+SOURCE_EXTENSIONS = ('.c', '.h', '.cc', '.cpp', '.cxx', '.hh', '.hpp', '.hxx', '.inl')
+
+# Extensions of the files --project reaches through #include rather than as entries
+HEADER_EXTENSIONS = ('.h', '.hh', '.hpp', '.hxx', '.inl')
+
+
+# Results of previously analyzed sources, see configure_cache()
+result_cache = ResultCache()
+
+# Call-graph summaries of the files scanned in project mode, a different shape than results
+summary_cache = ResultCache(namespace="summaries")
+
+
+def configure_cache(path: str = None, max_bytes: int = None):
+    """Replace the result caches, optionally backed by a SQLite file at path"""
+    global result_cache, summary_cache
+    result_cache = ResultCache(max_bytes or result_cache.max_bytes, path)
+    summary_cache = ResultCache(max_bytes or summary_cache.max_bytes, path, namespace="summaries")
+
+
+def project_summaries(code: str, blanked: str) -> dict:
+    """project.scan_file() summaries of a source, served from the summary cache when it was seen before"""
+    import callgraph
+    import project
+
+    key = source_key(code)
+    cached = summary_cache.get(key)
+    if cached is not None:
+        return callgraph.load_summaries(cached)
+    summaries = project.summarize(code, blanked)
+    summary_cache.put(key, summaries)
+    return summaries
+
+
+def analyze_code(code: str, program: ir.Program = None) -> dict:
+    """
+    Like run_analyzers(), but served from the result cache when the source was seen before.
+    Pass the program when it is needed for a report too, so the source is scanned once.
+    """
+    return result_cache.get_or_compute(code, lambda code: run_analyzers(code, program))
+
+
+def analyze_file(path: str, report: bool = False) -> dict:
+    """
+    Batch worker: analyze one file, keeping the recursion debug prints off stdout.
+    With report, the hotspot report of the file is added under "report".
+    """
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if os.path.getsize(path) >= MAP_THRESHOLD and not report:
+                result = analyze_large_file(path)
             else:
-                time_complexity = f"N^{max_depth}"
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    code = f.read()
+                program = ir.build(code) if report else None
+                result = analyze_code(code, program)
+                if report:
+                    result = dict(result, report=hotspots(code, program))
+    except OSError as e:
+        return {"path": path, "error": str(e)}
+    return {"path": path, **result}
 
-        return f"O({time_complexity})"
-    
 
-def analyze_logarithmic(code: str) -> str:
+def analyze_large_file(path: str) -> dict:
     """
-    Simplified function to detect O(log N) complexity patterns.
-    Detects these patterns:
-    1. for(type var=init; var<n; var*=2)
-    2. while(var<n) { var*=2; }
-    3. while(var) { var/=2; }
+    Analyze a file through a memory map, never holding its whole text as a str.
+    Lines are decoded one at a time and recursive function bodies are sliced from
+    the map by offset, so the worker only pays for pages the kernel can reclaim.
     """
-    
-    # Pattern 1: for loop with multiplication in increment
-    for_logn_pattern = r'for\s*\([^;]*;\s*[^;]*;\s*\w+\s*\*=\s*\d+\s*\)'
-    
-    # Pattern 2 & 3: while loops
-    while_pattern = r'while\s*\([^)]+\)'
-    mult_div_pattern = r'\w+\s*(\*=|/=)\s*\d+'
-    
-    lines = code.splitlines()
-    found_for_logn = False
-    in_while_loop = False
-    found_while_logn = False
-    current_depth = 0
-    
-    for line in lines:
-        line = line.strip()
-        
-        # Check for logarithmic for loop (Pattern 1)
-        if re.search(for_logn_pattern, line):
-            found_for_logn = True
-            current_depth += 1
-        
-        # Check for while loop start (Pattern 2 & 3)
-        elif re.search(while_pattern, line):
-            in_while_loop = True
-            current_depth += 1
-        
-        # Check for multiplication/division inside while loop
-        if in_while_loop and re.search(mult_div_pattern, line):
-            found_while_logn = True
-        
-        # Track closing braces
-        if '}' in line and current_depth > 0:
-            current_depth -= 1
-            if current_depth == 0:
-                in_while_loop = False
-    
-    # Return O(log N) if we found any logarithmic pattern and no nested loops
-    if (found_for_logn or found_while_logn) and current_depth == 0:
-        return "O(log N)"
-    else:
-        return "O(1)"
-
-
-def analyze_recursion(code: str) -> str:
-    # Detect recursive calls (function calling itself)
-    # Exclude C/C++ keywords from being treated as function names
-    c_keywords = {'for', 'while', 'if', 'else', 'switch', 'case', 'do', 'return', 'break', 'continue', 'goto'}
-    
-    all_matches = re.findall(r'\b(\w+)\s*\([^)]*\)\s*\n?\s*\{', code)
-    functions = [func for func in all_matches if func not in c_keywords]
-    detected = "O(1)"  # Default if no recursion found
-
-    for func in functions:
-        # Extract function body using brace counting
-        func_body = extract_function_body(code, func)
-        
-        if func_body:
-            # Remove comments to avoid false positives
-            func_body_no_comments = remove_comments(func_body)
-            
-            # Look for recursive calls inside the function (excluding comments)
-            pattern = rf'{func}\s*\([^)]*\)'
-            matches = re.findall(pattern, func_body_no_comments)
-
-            if matches:
-                # Print the recursive calls found (for debugging)
-                print(f"Found recursive calls in {func}: {matches}")
-                print(f"Function body (no comments): {func_body_no_comments.strip()[:200]}...")
-                
-                # Case 3: Recursive call inside a loop -> O(N!) (check this first)
-                if re.search(r'for\s*\([^)]*\)[^}]*{[^}]*' + pattern, func_body_no_comments, re.DOTALL):
-                    detected = "O(N!)"
-                    print(f"  -> Found recursive call inside loop: O(N!)")
-                
-                # Case 1: Single recursive call -> O(N)
-                elif len(matches) == 1:
-                    detected = "O(N)"
-                    print(f"  -> Single recursive call: O(N)")
-
-                # Case 2: Multiple recursive calls -> O(2^N) (like Fibonacci)
-                elif len(matches) >= 2:
-                    detected = "O(2^N)"
-                    print(f"  -> Multiple recursive calls: O(2^N)")
-
-    return detected
-
-
-def remove_comments(code: str) -> str:
-    """Remove C/C++ style comments from code"""
-    # Remove single-line comments //
-    code = re.sub(r'//.*$', '', code, flags=re.MULTILINE)
-    # Remove multi-line comments /* */
-    code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-    return code
-
-def extract_function_body(code: str, func_name: str) -> str:
+    from mapped_source import MappedSource  # Only large files need it
+
+    with MappedSource(path) as source:
+        # Hashed from the bytes, so the key is the one source_key() gives a smaller file
+        key = source_key_lines(source.iter_lines(raw=True))
+        result = result_cache.get(key)
+        if result is None:
+            result = analyze_stream(source.iter_lines(), source)
+            result_cache.put(key, result)
+    return result
+
+
+def split_file(path: str, submit, jobs: int, report: bool = False):
     """
-    Extract the body of a function using brace counting.
-    For: int factorial(int n) { ... }
-    Returns: the content between the outermost braces
+    Start analyzing one huge file across the pool with analyze_split(); returns a
+    callable that waits for it and gives the same result as analyze_file().
     """
-    # Find the function declaration
-    func_pattern = rf'\b{func_name}\s*\([^)]*\)\s*'
-    func_match = re.search(func_pattern, code)
-    
-    if not func_match:
-        return ""
-    
-    # Find the opening brace after the function declaration
-    start_pos = func_match.end()
-    
-    # Skip whitespace and newlines to find the opening brace
-    while start_pos < len(code) and code[start_pos] in ' \t\n\r':
-        start_pos += 1
-    
-    if start_pos >= len(code) or code[start_pos] != '{':
-        return ""
-    
-    # Count braces to find the matching closing brace
-    brace_count = 0
-    body_start = start_pos + 1  # Position after opening brace
-    
-    for i in range(start_pos, len(code)):
-        if code[i] == '{':
-            brace_count += 1
-        elif code[i] == '}':
-            brace_count -= 1
-            if brace_count == 0:
-                # Found the matching closing brace
-                return code[body_start:i]
-    
-    return ""  # No matching closing brace found
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            code = f.read()
+    except OSError as e:
+        return lambda: {"path": path, "error": str(e)}
+    key = source_key(code)
+    if not report:
+        cached = result_cache.get(key)
+        if cached is not None:
+            return lambda: {"path": path, **cached}
+    finish = analyze_split(code, submit, jobs, with_report=report)
+    del code  # The blocks are with the workers now
+
+    def result() -> dict:
+        combined = finish()
+        result = {"complexity": combined["complexity"], "analyzers": combined["analyzers"]}
+        result_cache.put(key, result)
+        if report:
+            result = dict(result, report=combined["report"])
+        return {"path": path, **result}
+
+    return result
+
+
+def expand_paths(patterns) -> list:
+    """Expand files, directories and glob patterns into a list of source files"""
+    files = []
+    seen = set()
+
+    def add(path):
+        if path not in seen:
+            seen.add(path)
+            files.append(path)
+
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for match in sorted(matches):
+            if os.path.isdir(match):
+                for root, dirs, names in os.walk(match):
+                    dirs.sort()
+                    for name in sorted(names):
+                        if name.endswith(SOURCE_EXTENSIONS):
+                            add(os.path.join(root, name))
+            elif os.path.isfile(match) or not glob.has_magic(pattern):
+                add(match)
+    return files
+
+
+def run_batch(patterns, jobs: int = None, chunksize: int = None, out=sys.stdout,
+              cache_path: str = None, report: bool = False, split: bool = False) -> int:
+    """
+    Analyze every file matched by the patterns on a process pool and write one
+    JSON line per file, in completion order. Returns the number of files analyzed.
+    With cache_path, results are shared through a SQLite cache across workers and runs.
+    With report, every line also carries the file's hotspot report.
+    With split, files of SPLIT_THRESHOLD bytes or more are spread over the pool block by block.
+    """
+    paths = expand_paths(patterns)
+    for result in iter_results(paths, jobs, chunksize, cache_path, report, split=split):
+        out.write(json.dumps(result) + "\n")
+    return len(paths)
+
+
+def iter_results(paths, jobs: int = None, chunksize: int = None, cache_path: str = None,
+                 report: bool = False, worker=None, split: bool = False):
+    """
+    analyze_file() results for the given files, in completion order, or those of another worker.
+    With split, the functions of files of SPLIT_THRESHOLD bytes or more are analyzed across
+    the pool too; their chunks are queued first and their results come last.
+    """
+    if worker is None:
+        worker = functools.partial(analyze_file, report=True) if report else analyze_file
+    jobs = jobs or available_cores()
+    if chunksize is None:
+        # Several chunks per worker keeps the pool balanced while amortizing
+        # the inter-process round trip over many small files
+        chunksize = max(1, min(64, len(paths) // (jobs * 8)))
+
+    large = []
+    if split and jobs > 1:
+        large = [path for path in paths if os.path.isfile(path) and os.path.getsize(path) >= SPLIT_THRESHOLD]
+
+    if jobs == 1 or (len(paths) <= 1 and not large):
+        # No pool to pay for when only one worker is wanted
+        configure_cache(cache_path)
+        yield from map(worker, paths)
+        return
+
+    import multiprocessing  # Spawning the pool is the only use; keep it off the cold-start path
+
+    with multiprocessing.Pool(jobs, initializer=configure_cache, initargs=(cache_path,)) as pool:
+        if not large:
+            yield from pool.imap_unordered(worker, paths, chunksize)
+            return
+
+        # The parent reads and splits the huge files, so it needs the cache too
+        configure_cache(cache_path)
+
+        def submit(blocks):
+            return pool.apply_async(analyze_chunk, (blocks,))
+
+        started = [split_file(path, submit, jobs, report) for path in large]
+        skip = set(large)
+        yield from pool.imap_unordered(worker, [path for path in paths if path not in skip], chunksize)
+        for result in started:
+            yield result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate the time complexity of C/C++ code.")
+    parser.add_argument("paths", nargs="*",
+                        help="files, directories or glob patterns to analyze in batch mode "
+                             "(reads a snippet from stdin when omitted)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes for batch mode (default: available cores)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="files handed to a worker per task (default: derived from the file count)")
+    parser.add_argument("--cache", metavar="PATH", default=None,
+                        help="SQLite file that keeps results between runs, keyed by source hash")
+    parser.add_argument("--stream", action="store_true",
+                        help="analyze stdin line by line instead of reading it whole (for very large inputs)")
+    parser.add_argument("--report", choices=["table", "json"], nargs="?", const="table", default=None,
+                        help="list every function and loop nest with its line range and estimated cost, "
+                             "costliest first (default format: table; batch mode always embeds JSON)")
+    parser.add_argument("--split", action="store_true",
+                        help="batch mode: analyze files of 1 MiB or more function by function across the "
+                             "worker pool, so one huge file does not set the wall-clock time of the run")
+    parser.add_argument("--baseline", metavar="PATH", default=None,
+                        help="batch mode: record per-function complexities to PATH, or when it exists, "
+                             "re-analyze changed files and exit 1 if any function got more complex")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="with --baseline: rewrite PATH with the current results even after a check")
+    parser.add_argument("--project", action="store_true",
+                        help="treat the .c/.cpp files among the paths as translation units: follow their "
+                             "#include \"...\" directives, scan every header once and print one JSON line "
+                             "per unit with its worst-case complexity")
+    parser.add_argument("-I", "--include-dir", metavar="DIR", action="append", default=[],
+                        help="with --project: also look for included files in DIR (repeatable)")
+    parser.add_argument("--verify", metavar="FUNCTION", nargs="?", const="", default=None,
+                        help="stdin mode: compile the snippet with the local C/C++ compiler, time FUNCTION "
+                             "(default: the costliest one that can be called) for growing N and print the "
+                             "measured complexity next to the static one (needs numpy)")
+    parser.add_argument("--profile", metavar="PATH", nargs="?", const="ometer.prof", default=None,
+                        help="time each analyzer, count regex evaluations and write pstats data to PATH "
+                             "(default: ometer.prof); runs in-process without the disk cache")
+    args = parser.parse_args(argv)
+    if args.report and args.stream:
+        parser.error("--report needs the whole input and cannot be combined with --stream")
+    if args.verify is not None and (args.paths or args.stream):
+        parser.error("--verify times one snippet read whole from stdin")
+    if args.baseline and not args.paths:
+        parser.error("--baseline needs files, directories or patterns to analyze")
+    if args.split and not args.paths:
+        parser.error("--split spreads files of batch mode over the pool and needs paths")
+    if args.project and (not args.paths or args.baseline or args.report):
+        parser.error("--project needs entry files and cannot be combined with --baseline or --report")
+
+    if args.profile:
+        import core
+        import lexer
+
+        # Everything has to run here, uncached, for the numbers to mean anything
+        args.jobs = 1
+        args.cache = None
+        with profiling.profiled(modules=[lexer, core], cprofile=True) as profile:
+            run(args)
+        print(json.dumps(profile.report(), indent=2), file=sys.stderr)
+        profile.dump_stats(args.profile)
+        print(f"pstats written to {args.profile}", file=sys.stderr)
+        return
+
+    run(args)
+
+
+def run(args):
+    """Batch or stdin mode, as chosen on the command line"""
+    if args.baseline:
+        import baseline
+
+        def analyze(paths):
+            return iter_results(paths, args.jobs, args.chunksize, args.cache, report=True, split=args.split)
+
+        sys.exit(baseline.run(expand_paths(args.paths), args.baseline, analyze, args.update_baseline))
+
+    if args.project:
+        import project
+
+        # Headers are reached through the includes; only the units themselves are entries
+        entries = [path for path in expand_paths(args.paths) if not path.endswith(HEADER_EXTENSIONS)]
+        worker = functools.partial(project.scan_file, include_dirs=tuple(args.include_dir),
+                                   summaries=project_summaries)
+
+        def analyze(paths):
+            return iter_results(paths, args.jobs, args.chunksize, args.cache, worker=worker)
+
+        for result in project.run(entries, analyze):
+            print(json.dumps(result))
+        return
+
+    if args.paths:
+        run_batch(args.paths, args.jobs, args.chunksize, cache_path=args.cache, report=bool(args.report),
+                  split=args.split)
+        return
+
+    configure_cache(args.cache)
+
+    print("Enter your C/CPP code below. Press Ctrl+D (Unix/macOS) or Ctrl+Z then Enter (Windows) to finish:\n")
+    if args.stream:
+        result = analyze_stream(sys.stdin)
+    else:
+        code = sys.stdin.read()
+        program = ir.build(code) if args.report else None
+        result = analyze_code(code, program)
+    print("Worst-case complexity:", result["complexity"])
+    if args.verify is not None:
+        import verify
+
+        try:
+            print("Measured complexity:  ", verify.describe(verify.verify(code, args.verify or None)))
+        except verify.VerifyError as e:
+            print("Measured complexity:   unavailable:", e)
+    if args.report:
+        entries = hotspots(code, program)
+        print()
+        print(json.dumps(entries, indent=2) if args.report == "json" else format_table(entries))
+    # print("Detailed complexities:", result["analyzers"])
 
 
 # Example usage:
 if __name__ == "__main__":
-    print("Enter your C/CPP code below. Press Ctrl+D (Unix/macOS) or Ctrl+Z then Enter (Windows) to finish:\n")
-    code = sys.stdin.read()
-    
-    highest_time_complexity = "O(1)" #Initialize max time complexity to O(1)
-    functions = [analyze_exponential, analyze_logarithmic, analyze_recursion] # Store functions in a list
-    time_complexity_serial = {   #In the dictionary, the time complexities are organized in ascending order and initializedd to False
-        "O(1)": False,
-        "O(log N)": False,
-        "O(N)": False,
-        "O(NLogN)": False,
-        "O(N^2)": False,
-        "O(N^2LogN)": False,
-        "O(N^3)": False,
-        "O(N^4)": False,
-        "O(2^N)": False,
-        "O(N!)": False
-    }
-    
-    for func in functions:
-        result = func(code)
-        if result in time_complexity_serial:
-            time_complexity_serial[result] = True
-            
-    for complexity in ["O(log N)", "O(N)", "O(NLogN)", "O(N^2)", "O(N^2LogN)", "O(N^3)", "O(N^4)", "O(2^N)", "O(N!)"]:
-        if time_complexity_serial[complexity]:
-            highest_time_complexity = complexity        
-            
-
-    print("Worst-case complexity:", highest_time_complexity)
-    # print("Detailed complexities:", time_complexity_serial)
+    main()
@@ -0,0 +1,205 @@
+"""
+Library API for tools that import O-meter and have many sources to analyze.
+
+    import api
+
+    for result in api.analyze_many(rows, window=256):
+        print(result["index"], result["complexity"])
+
+    async for result in api.analyze_many_async(fetch_rows(), executor="thread"):
+        ...
+
+Sources are consumed lazily and at most `window` of them are in flight or
+waiting to be yielded at any time, so a source of millions of snippets streams
+through in constant memory. Every result carries the position of its source:
+
+    {"index": 3, "complexity": "O(N^2)", "analyzers": {...}}
+    {"index": 4, "error": "..."}
+
+Results come in completion order, or in input order with ordered=True (a slow
+source then holds back the ones after it, within the window).
+"""
+import asyncio
+import concurrent.futures
+from typing import AsyncIterator, Iterator, Optional
+
+from cache import ResultCache, source_key
+
+
+# Sources in flight per worker when no window is given
+WINDOW_PER_WORKER = 4
+
+
+def _discard(*args):
+    pass
+
+
+def analyze_source(code: str) -> dict:
+    """Worker: run_analyzers() with the recursion findings dropped"""
+    import core  # Imported in the worker, like service.analyze_snippet
+
+    # Findings go nowhere instead of redirecting stdout, which threads would race on
+    return core.run_analyzers(code, log=_discard)
+
+
+def _executor(executor, workers: Optional[int]):
+    """(executor, whether this call owns it, workers) for the executor parameter"""
+    if isinstance(executor, concurrent.futures.Executor):
+        return executor, False, workers or getattr(executor, "_max_workers", 1)
+    if workers is None:
+        from core import available_cores
+
+        workers = available_cores()
+    if executor == "process":
+        return concurrent.futures.ProcessPoolExecutor(workers), True, workers
+    if executor == "thread":
+        return concurrent.futures.ThreadPoolExecutor(workers), True, workers
+    raise ValueError(f"executor must be 'process', 'thread' or an Executor, not {executor!r}")
+
+
+def _lookup(code, cache: Optional[ResultCache]) -> tuple:
+    """(cache key, cached result) of a source; (None, None) without a cache or a str to hash"""
+    if cache is None or not isinstance(code, str):
+        return None, None  # Anything else fails in the worker and becomes an error result
+    key = source_key(code)
+    return key, cache.get(key)
+
+
+async def _lookup_async(loop, code, cache: Optional[ResultCache]) -> tuple:
+    """_lookup() on a thread when the cache has a SQLite tier, as service.py does"""
+    if cache is None or cache.path is None:
+        return _lookup(code, cache)  # Memory only: cheaper than a thread hop
+    return await loop.run_in_executor(None, _lookup, code, cache)
+
+
+def _outcome(index: int, future, key: str, cache: Optional[ResultCache]) -> dict:
+    """Result of one finished source, stored in the cache when it was analyzed"""
+    try:
+        result = future.result()
+    except Exception as e:
+        return {"index": index, "error": str(e)}
+    if cache is not None and key is not None:
+        cache.put(key, result)
+    return {"index": index, **result}
+
+
+async def _outcome_async(loop, index: int, future, key: str, cache: Optional[ResultCache]) -> dict:
+    """_outcome() with the cache write on a thread when the cache has a SQLite tier"""
+    if cache is None or cache.path is None or key is None:
+        return _outcome(index, future, key, cache)
+    return await loop.run_in_executor(None, _outcome, index, future, key, cache)
+
+
+class _Reorder:
+    """Holds finished results until every earlier one is out, for ordered=True"""
+
+    def __init__(self, ordered: bool):
+        self.ordered = ordered
+        self.waiting = {}  # index -> result finished ahead of its turn
+        self.next = 0
+
+    def push(self, result: dict) -> list:
+        """Results that may be yielded now"""
+        if not self.ordered:
+            return [result]
+        self.waiting[result["index"]] = result
+        ready = []
+        while self.next in self.waiting:
+            ready.append(self.waiting.pop(self.next))
+            self.next += 1
+        return ready
+
+
+def analyze_many(sources, ordered: bool = False, window: int = None, workers: int = None,
+                 executor="process", cache: ResultCache = None) -> Iterator[dict]:
+    """
+    Analyze every source of an iterable, yielding one result per source as it completes.
+    executor is "process" (default), "thread" or an Executor to reuse, which is then left
+    open. window bounds the sources in flight or held for ordering (default: 4 per worker).
+    With cache, hits are answered without a worker and new results are stored.
+    """
+    pool, owned, workers = _executor(executor, workers)
+    window = window or WINDOW_PER_WORKER * workers
+    reorder = _Reorder(ordered)
+    pending = {}  # future -> (index, cache key)
+    sources = enumerate(sources)
+    exhausted = False
+    try:
+        while True:
+            # Backpressure: the next source is only pulled once there is room for it
+            while not exhausted and len(pending) + len(reorder.waiting) < window:
+                try:
+                    index, code = next(sources)
+                except StopIteration:
+                    exhausted = True
+                    break
+                key, cached = _lookup(code, cache)
+                if cached is None:
+                    future = pool.submit(analyze_source, code)
+                else:
+                    future = concurrent.futures.Future()
+                    future.set_result(cached)
+                    key = None  # Already stored
+                pending[future] = (index, key)
+            if not pending:
+                break
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in sorted(done, key=lambda future: pending[future][0]):
+                index, key = pending.pop(future)
+                yield from reorder.push(_outcome(index, future, key, cache))
+    finally:
+        # Also reached when the caller stops iterating early
+        for future in pending:
+            future.cancel()
+        if owned:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def analyze_many_async(sources, ordered: bool = False, window: int = None, workers: int = None,
+                             executor="process", cache: ResultCache = None) -> AsyncIterator[dict]:
+    """
+    analyze_many() for asyncio: sources may be an iterable or an async iterable,
+    and results are yielded without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    pool, owned, workers = _executor(executor, workers)
+    window = window or WINDOW_PER_WORKER * workers
+    reorder = _Reorder(ordered)
+    pending = {}  # future -> (index, cache key)
+    if hasattr(sources, "__aiter__"):
+        iterator = sources.__aiter__()
+    else:
+        iterator = None
+        plain = iter(sources)
+    index = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) + len(reorder.waiting) < window:
+                try:
+                    code = await iterator.__anext__() if iterator is not None else next(plain)
+                except (StopIteration, StopAsyncIteration):
+                    exhausted = True
+                    break
+                key, cached = await _lookup_async(loop, code, cache)
+                if cached is None:
+                    future = loop.run_in_executor(pool, analyze_source, code)
+                else:
+                    future = loop.create_future()
+                    future.set_result(cached)
+                    key = None  # Already stored
+                pending[future] = (index, key)
+                index += 1
+            if not pending:
+                break
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in sorted(done, key=lambda future: pending[future][0]):
+                index_done, key = pending.pop(future)
+                outcome = await _outcome_async(loop, index_done, future, key, cache)
+                for result in reorder.push(outcome):
+                    yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -1,240 +1,21 @@
 import streamlit as st
-import re
-import io
-import sys
-from contextlib import redirect_stdout
+import os
+import time
 
+import profiling
+import verify
+from cache import ResultCache, source_key
+from core import SKIPPED, analyze_blocks, analyze_chunk, complexity_cost, growth_curves
+from live import LiveWorker
+from sandbox import (DEFAULT_CPU_SECONDS, DEFAULT_MAX_REQUESTS, DEFAULT_MEMORY_BYTES, DEFAULT_WORKERS,
+                     BudgetExceeded, SandboxError, SandboxPool)
 
-def analyze_exponential(code: str) -> str:
-    
-    # Updated patterns to better detect logarithmic loops
-    FOR_LOOP_O_N = r'for\s*\([^)]*(\+\+|--|[\+-]=)[^)]*\)'
-    FOR_LOOP_O_LOGN = r'for\s*\([^)]*(\*=|/=)[^)]*\)'
-    
-    WHILE_LOOP_O_N = r'while\s*\(\s*(\w+)(?:\s*[<>=!]+.*?)?\s*\)'
-    WHILE_LOOP_O_LOGN = r'(\w+)\s*(\*|/)=\s*\d+'
-    
-    max_depth = 0
-    current_depth = 0
-    log_n_detected = False
-    inside_while = False
-    while_variable = None
-    inside_for_loop = False
-
-    for line in code.splitlines():
-        line = line.strip()  # Remove leading/trailing whitespace
-        
-        # Check for for loops
-        for_n_match = re.search(FOR_LOOP_O_N, line)
-        for_log_match = re.search(FOR_LOOP_O_LOGN, line)
-        
-        if for_n_match or for_log_match:
-            current_depth += 1
-            max_depth = max(max_depth, current_depth)
-            inside_for_loop = True
-            
-            # Check if this loop is logarithmic
-            if for_log_match:
-                log_n_detected = True
-        
-        # Detect while loop start
-        elif re.search(WHILE_LOOP_O_N, line):
-            while_match = re.search(WHILE_LOOP_O_N, line)
-            if while_match:
-                while_variable = while_match.group(1)
-                inside_while = True
-                current_depth += 1
-                max_depth = max(max_depth, current_depth)
-        
-        # Check for logarithmic operations inside while loop or for loop
-        if inside_while and while_variable:
-            log_match = re.search(WHILE_LOOP_O_LOGN, line)
-            if log_match and log_match.group(1) == while_variable:
-                log_n_detected = True
-        
-        # Also check for logarithmic operations inside for loop body
-        if inside_for_loop:
-            log_match = re.search(WHILE_LOOP_O_LOGN, line)
-            if log_match:
-                log_n_detected = True
-
-        # Detect block ending - only on closing braces
-        if "}" in line:
-            if current_depth > 0:
-                current_depth -= 1
-                if inside_while and current_depth == 0:
-                    inside_while = False
-                    while_variable = None
-                if inside_for_loop and current_depth == 0:
-                    inside_for_loop = False
-
-    # Decide complexity from max depth
-    if max_depth == 0:
-        return "O(1)"
-    else:
-        time_complexity = ""
-        if max_depth == 1:
-            if log_n_detected:
-                time_complexity = "log N"  # Single logarithmic loop
-            else:
-                time_complexity = "N"     # Single linear loop
-        else:
-            # If logarithmic detected, reduce the power by 1
-            if log_n_detected:
-                if max_depth == 2:
-                    time_complexity = "NLogN"  # N^2 becomes N*LogN when one loop is logarithmic
-                else:
-                    time_complexity = f"N^{max_depth-1}LogN"  # Reduce power by 1 and add LogN
-            else:
-                time_complexity = f"N^{max_depth}"
 
-        return f"O({time_complexity})"
-    
+# Seconds between reruns while live analysis is still running
+LIVE_POLL_SECONDS = 0.3
 
-def analyze_logarithmic(code: str) -> str:
-    """
-    Simplified function to detect O(log N) complexity patterns.
-    Detects these patterns:
-    1. for(type var=init; var<n; var*=2)
-    2. while(var<n) { var*=2; }
-    3. while(var) { var/=2; }
-    """
-    
-    # Pattern 1: for loop with multiplication in increment
-    for_logn_pattern = r'for\s*\([^;]*;\s*[^;]*;\s*\w+\s*\*=\s*\d+\s*\)'
-    
-    # Pattern 2 & 3: while loops
-    while_pattern = r'while\s*\([^)]+\)'
-    mult_div_pattern = r'\w+\s*(\*=|/=)\s*\d+'
-    
-    lines = code.splitlines()
-    found_for_logn = False
-    in_while_loop = False
-    found_while_logn = False
-    current_depth = 0
-    
-    for line in lines:
-        line = line.strip()
-        
-        # Check for logarithmic for loop (Pattern 1)
-        if re.search(for_logn_pattern, line):
-            found_for_logn = True
-            current_depth += 1
-        
-        # Check for while loop start (Pattern 2 & 3)
-        elif re.search(while_pattern, line):
-            in_while_loop = True
-            current_depth += 1
-        
-        # Check for multiplication/division inside while loop
-        if in_while_loop and re.search(mult_div_pattern, line):
-            found_while_logn = True
-        
-        # Track closing braces
-        if '}' in line and current_depth > 0:
-            current_depth -= 1
-            if current_depth == 0:
-                in_while_loop = False
-    
-    # Return O(log N) if we found any logarithmic pattern and no nested loops
-    if (found_for_logn or found_while_logn) and current_depth == 0:
-        return "O(log N)"
-    else:
-        return "O(1)"
-
-
-def analyze_recursion(code: str) -> str:
-    # Detect recursive calls (function calling itself)
-    # Exclude C/C++ keywords from being treated as function names
-    c_keywords = {'for', 'while', 'if', 'else', 'switch', 'case', 'do', 'return', 'break', 'continue', 'goto'}
-    
-    all_matches = re.findall(r'\b(\w+)\s*\([^)]*\)\s*\n?\s*\{', code)
-    functions = [func for func in all_matches if func not in c_keywords]
-    detected = "O(1)"  # Default if no recursion found
-    
-    debug_output = []
-
-    for func in functions:
-        # Extract function body using brace counting
-        func_body = extract_function_body(code, func)
-        
-        if func_body:
-            # Remove comments to avoid false positives
-            func_body_no_comments = remove_comments(func_body)
-            
-            # Look for recursive calls inside the function (excluding comments)
-            pattern = rf'{func}\s*\([^)]*\)'
-            matches = re.findall(pattern, func_body_no_comments)
-
-            if matches:
-                # Store debug info instead of printing
-                debug_output.append(f"Found recursive calls in {func}: {matches}")
-                debug_output.append(f"Function body (no comments): {func_body_no_comments.strip()[:200]}...")
-                
-                # Case 3: Recursive call inside a loop -> O(N!) (check this first)
-                if re.search(r'for\s*\([^)]*\)[^}]*{[^}]*' + pattern, func_body_no_comments, re.DOTALL):
-                    detected = "O(N!)"
-                    debug_output.append(f"  -> Found recursive call inside loop: O(N!)")
-                
-                # Case 1: Single recursive call -> O(N)
-                elif len(matches) == 1:
-                    detected = "O(N)"
-                    debug_output.append(f"  -> Single recursive call: O(N)")
-
-                # Case 2: Multiple recursive calls -> O(2^N) (like Fibonacci)
-                elif len(matches) >= 2:
-                    detected = "O(2^N)"
-                    debug_output.append(f"  -> Multiple recursive calls: O(2^N)")
-
-    return detected, debug_output
-
-
-def remove_comments(code: str) -> str:
-    """Remove C/C++ style comments from code"""
-    # Remove single-line comments //
-    code = re.sub(r'//.*$', '', code, flags=re.MULTILINE)
-    # Remove multi-line comments /* */
-    code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
-    return code
-
-
-def extract_function_body(code: str, func_name: str) -> str:
-    """
-    Extract the body of a function using brace counting.
-    For: int factorial(int n) { ... }
-    Returns: the content between the outermost braces
-    """
-    # Find the function declaration
-    func_pattern = rf'\b{func_name}\s*\([^)]*\)\s*'
-    func_match = re.search(func_pattern, code)
-    
-    if not func_match:
-        return ""
-    
-    # Find the opening brace after the function declaration
-    start_pos = func_match.end()
-    
-    # Skip whitespace and newlines to find the opening brace
-    while start_pos < len(code) and code[start_pos] in ' \t\n\r':
-        start_pos += 1
-    
-    if start_pos >= len(code) or code[start_pos] != '{':
-        return ""
-    
-    # Count braces to find the matching closing brace
-    brace_count = 0
-    body_start = start_pos + 1  # Position after opening brace
-    
-    for i in range(start_pos, len(code)):
-        if code[i] == '{':
-            brace_count += 1
-        elif code[i] == '}':
-            brace_count -= 1
-            if brace_count == 0:
-                # Found the matching closing brace
-                return code[body_start:i]
-    
-    return ""  # No matching closing brace found
+# Classes drawn in the Performance Comparison chart
+CHART_CLASSES = ["O(1)", "O(log N)", "O(N)", "O(NLogN)", "O(N^2)", "O(N^3)"]
 
 
 def get_complexity_color(complexity):
@@ -271,6 +52,112 @@ def get_complexity_description(complexity):
     return descriptions.get(complexity, "Unknown complexity")
 
 
+def run_analysis(code: str, known: dict = None, cancelled=None, sandbox=None) -> dict:
+    """Run all analyzers over the code and collect everything the results panel shows"""
+    # Only top-level blocks missing from known (block hash -> result) are analyzed again
+    analyze = None
+    if sandbox is not None:
+        # in budgeted worker processes; raises BudgetExceeded instead of hogging this thread
+        def analyze(blocks):
+            return sandbox.run(blocks, cancelled)
+    analysis = analyze_blocks(code, known, cancelled, analyze)
+    if analysis is None:
+        return None  # Cancelled by a newer edit
+    results = [result for result in analysis["analyzers"].values() if result != SKIPPED]
+
+    return {
+        "complexity": analysis["complexity"],
+        "detected": sorted(set(results), key=complexity_cost),  # Also classes COMPLEXITY_ORDER does not list
+        "debug_output": analysis["findings"],
+        "functions_found": analysis["functions"],
+        "loops_found": analysis["loops"],
+        "hotspots": analysis["report"],
+    }
+
+
+@st.cache_resource
+def get_sandbox():
+    """
+    Worker processes shared by every session, or None when OMETER_SANDBOX_WORKERS=0.
+    Each request gets OMETER_CPU_SECONDS of CPU time and OMETER_MEMORY_MB of memory.
+    """
+    workers = int(os.environ.get("OMETER_SANDBOX_WORKERS", DEFAULT_WORKERS))
+    if workers <= 0:
+        return None
+    return SandboxPool(
+        # Workers only see the blocks a session has not analyzed yet
+        analyze_chunk,
+        workers=workers,
+        cpu_seconds=float(os.environ.get("OMETER_CPU_SECONDS", DEFAULT_CPU_SECONDS)),
+        memory_bytes=int(os.environ.get("OMETER_MEMORY_MB", DEFAULT_MEMORY_BYTES // 2**20)) * 2**20,
+        max_requests=int(os.environ.get("OMETER_MAX_REQUESTS", DEFAULT_MAX_REQUESTS)),
+    )
+
+
+@st.cache_resource
+def get_result_cache():
+    """One result cache per server process, shared by every session"""
+    # Set OMETER_CACHE to a file path to keep results on disk across restarts.
+    # The app stores its own result shape, so its entries live in their own namespace
+    return ResultCache(path=os.environ.get("OMETER_CACHE"), namespace="app")
+
+
+def profile_analysis(code: str):
+    """Run the analysis uncached under the profiler; returns (analysis, profile)"""
+    import core
+    import lexer
+
+    with profiling.profiled(modules=[lexer, core], cprofile=True) as profile:
+        analysis = run_analysis(code)
+    return analysis, profile
+
+
+def profile_stats_bytes(profile) -> bytes:
+    """pstats dump of a profile, for the download button"""
+    import tempfile
+
+    fd, path = tempfile.mkstemp(suffix=".prof")
+    os.close(fd)
+    try:
+        profile.dump_stats(path)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def draw_growth_chart():
+    """Line chart of how the common complexity classes grow with N"""
+    import pandas as pd  # Only loaded once a chart is actually drawn
+
+    # Same curves the timing verification fits against
+    n_values = [10, 50, 100, 500, 1000]
+    complexities = growth_curves(n_values, CHART_CLASSES)
+
+    df = pd.DataFrame(complexities, index=n_values)
+    st.line_chart(df)
+
+
+def get_live_worker() -> LiveWorker:
+    """The session's background worker for live mode, created on first use"""
+    if "live_worker" not in st.session_state:
+        cache = get_result_cache()  # Resolved here; the worker thread has no script context
+        sandbox = get_sandbox()
+        known = {}  # Block results of the worker thread alone, never touched by the script
+
+        def analyze(code, cancelled):
+            key = source_key(code)
+            analysis = cache.get(key)
+            if analysis is None:
+                analysis = run_analysis(code, known, cancelled, sandbox)
+                if analysis is not None:
+                    cache.put(key, analysis)
+            return analysis
+
+        st.session_state["live_worker"] = LiveWorker(analyze)
+    return st.session_state["live_worker"]
+
+
 # Streamlit App Configuration
 st.set_page_config(
     page_title="O-meter: Time Complexity Analyzer",
@@ -382,6 +269,19 @@ int fibonacci(int n) {
     return fibonacci(n-1) + fibonacci(n-2);
 }
             """, language="c")
+
+        st.markdown("---")
+        # Analyze while typing instead of on the button
+        live_enabled = st.checkbox("⚡ Live analysis", value=True)
+        # Runs the analysis uncached and shows where the time went; it has to run in
+        # this process, so it is only offered when analyses are not sandboxed
+        profile_enabled = get_sandbox() is None and st.checkbox("🔬 Profile analysis", value=False)
+        # Compiles and runs the pasted code on this machine: only offered when the operator
+        # explicitly allows it with OMETER_ALLOW_VERIFY=1, never just because the sandbox is off
+        verify_enabled = (os.environ.get("OMETER_ALLOW_VERIFY") == "1" and get_sandbox() is None
+                          and verify.find_compiler(False) is not None
+                          and st.checkbox("⏱️ Verify by timing", value=False,
+                                          help="Compile the code, time it for growing N and fit the timings"))
     
     # Main content area
     col1, col2 = st.columns([2, 1])
@@ -404,112 +304,172 @@ int fibonacci(int n) {
             label_visibility="collapsed"
         )
         
+        if live_enabled and not profile_enabled and not verify_enabled:
+            # Live mode: every edit goes to the session's background worker, and the
+            # last complete result stays on screen while a newer one is computed
+            worker = get_live_worker()
+            if user_code.strip():
+                worker.submit(user_code)
+            snapshot = worker.snapshot()
+            if snapshot.error is not None:
+                show_error(snapshot.error)
+            if snapshot.pending:
+                st.caption("⏳ Analyzing your latest edit..."
+                           + (" showing the previous result" if snapshot.result is not None else ""))
+            elif not user_code.strip():
+                st.warning("Please enter some code to analyze!")
+
+            if snapshot.result is not None:
+                show_results(snapshot.result, None, snapshot.code, col2)
+
+            if snapshot.pending:
+                # Poll until the worker catches up; any interaction interrupts this rerun
+                time.sleep(LIVE_POLL_SECONDS)
+                st.rerun()
+            return
+
         # Analyze button
         if st.button("🔍 Analyze Complexity", type="primary", use_container_width=True):
             if user_code.strip():
                 # Run analysis
                 with st.spinner("Analyzing your code..."):
-                    highest_time_complexity = "O(1)"
-                    functions = [analyze_exponential, analyze_logarithmic]
-                    
-                    # Modified to handle recursion analysis separately
-                    recursion_result, debug_output = analyze_recursion(user_code)
-                    functions_results = [func(user_code) for func in functions] + [recursion_result]
-                    
-                    time_complexity_serial = {
-                        "O(1)": False,
-                        "O(log N)": False,
-                        "O(N)": False,
-                        "O(NLogN)": False,
-                        "O(N^2)": False,
-                        "O(N^2LogN)": False,
-                        "O(N^3)": False,
-                        "O(N^4)": False,
-                        "O(2^N)": False,
-                        "O(N!)": False
-                    }
-                    
-                    for result in functions_results:
-                        if result in time_complexity_serial:
-                            time_complexity_serial[result] = True
-                    
-                    # Find highest complexity
-                    for complexity in ["O(log N)", "O(N)", "O(NLogN)", "O(N^2)", "O(N^2LogN)", "O(N^3)", "O(N^4)", "O(2^N)", "O(N!)"]:
-                        if time_complexity_serial[complexity]:
-                            highest_time_complexity = complexity
-                
-                # Display results in col2
-                with col2:
-                    st.markdown("### 📊 Analysis Result")
-                    
-                    # Main result
-                    color = get_complexity_color(highest_time_complexity)
-                    st.markdown(
-                        f'<div class="complexity-result" style="background-color: {color};">'
-                        f'{highest_time_complexity}'
-                        f'</div>',
-                        unsafe_allow_html=True
-                    )
-                    
-                    # Description
-                    description = get_complexity_description(highest_time_complexity)
-                    st.info(description)
-                    
-                    # Detailed breakdown
-                    st.markdown("### 📈 Complexity Breakdown")
-                    detected_complexities = [k for k, v in time_complexity_serial.items() if v]
-                    
-                    for complexity in detected_complexities:
-                        color = get_complexity_color(complexity)
-                        st.markdown(
-                            f'<span style="color: {color}; font-weight: bold;">●</span> {complexity}',
-                            unsafe_allow_html=True
-                        )
-                    
-                    # Show debug output if recursion was detected
-                    if debug_output:
-                        st.markdown("### 🔍 Analysis Details")
-                        for output in debug_output:
-                            st.text(output)
-                
-                # Performance visualization
-                st.markdown("---")
-                st.markdown("### 📈 Performance Comparison")
-                
-                import pandas as pd
-                import numpy as np
-                
-                # Generate sample data for visualization
-                n_values = [10, 50, 100, 500, 1000]
-                complexities = {
-                    "O(1)": [1] * 5,
-                    "O(log N)": [np.log2(n) for n in n_values],
-                    "O(N)": n_values,
-                    "O(N log N)": [n * np.log2(n) for n in n_values],
-                    "O(N²)": [n**2 for n in n_values],
-                    "O(N³)": [n**3 for n in n_values]
-                }
-                
-                df = pd.DataFrame(complexities, index=n_values)
-                st.line_chart(df)
-                
-                # Code metrics
-                col3, col4, col5 = st.columns(3)
-                
-                with col3:
-                    st.metric("Lines of Code", len(user_code.splitlines()))
-                
-                with col4:
-                    functions_found = len(re.findall(r'\b(\w+)\s*\([^)]*\)\s*\{', user_code))
-                    st.metric("Functions Found", functions_found)
-                
-                with col5:
-                    loops_found = len(re.findall(r'(for|while)\s*\(', user_code))
-                    st.metric("Loops Found", loops_found)
+                    if profile_enabled:
+                        analysis, profile = profile_analysis(user_code)
+                    else:
+                        # Previously seen sources are answered from the result cache, and after
+                        # an edit only the functions and blocks that changed are analyzed again
+                        known = st.session_state.setdefault("block_results", {})
+                        sandbox = get_sandbox()
+                        try:
+                            analysis = get_result_cache().get_or_compute(
+                                user_code, lambda code: run_analysis(code, known, sandbox=sandbox))
+                        except (BudgetExceeded, SandboxError) as e:
+                            analysis = None
+                            show_error(e)
+                        profile = None
+
+                measurement = None
+                if analysis is not None and verify_enabled:
+                    with st.spinner("Compiling and timing your code..."):
+                        try:
+                            measurement = verify.verify(user_code)
+                        except verify.VerifyError as e:
+                            st.warning(f"⏱️ Timing verification failed: {e}")
+
+                if analysis is not None:
+                    show_results(analysis, profile, user_code, col2, measurement)
             
             else:
                 st.warning("Please enter some code to analyze!")
 
 
+def show_error(error: Exception):
+    """Explain a failed analysis; budget failures are expected on hostile input"""
+    if isinstance(error, BudgetExceeded):
+        st.error(f"⛔ {str(error).capitalize()}. Try a smaller snippet.")
+    else:
+        st.error(f"Analysis failed: {type(error).__name__}: {error}")
+
+
+def show_results(analysis: dict, profile, user_code: str, col2, measurement=None):
+    """Result panel in col2, then the growth chart and code metrics below the editor"""
+    highest_time_complexity = analysis["complexity"]
+    debug_output = analysis["debug_output"]
+
+    # Display results in col2
+    with col2:
+        st.markdown("### 📊 Analysis Result")
+        
+        # Main result
+        color = get_complexity_color(highest_time_complexity)
+        st.markdown(
+            f'<div class="complexity-result" style="background-color: {color};">'
+            f'{highest_time_complexity}'
+            f'</div>',
+            unsafe_allow_html=True
+        )
+        
+        # Description
+        description = get_complexity_description(highest_time_complexity)
+        st.info(description)
+
+        # What the compiled code actually did, next to the static estimate
+        if measurement is not None:
+            st.markdown("### ⏱️ Measured")
+            static_col, measured_col = st.columns(2)
+            static_col.metric("Static estimate", highest_time_complexity)
+            measured_col.metric("Measured", measurement.complexity)
+            st.caption(verify.describe(measurement))
+            if measurement.complexity != highest_time_complexity:
+                st.warning("The timings disagree with the static estimate. "
+                           "Constant loop bounds or early exits are typical reasons.")
+        
+        # Detailed breakdown
+        st.markdown("### 📈 Complexity Breakdown")
+        detected_complexities = analysis["detected"]
+        
+        for complexity in detected_complexities:
+            color = get_complexity_color(complexity)
+            st.markdown(
+                f'<span style="color: {color}; font-weight: bold;">●</span> {complexity}',
+                unsafe_allow_html=True
+            )
+        
+        # Show debug output if recursion was detected
+        if debug_output:
+            st.markdown("### 🔍 Analysis Details")
+            for output in debug_output:
+                st.text(output)
+
+        # Per-analyzer timings and regex counts from the profiled run
+        if profile is not None:
+            st.markdown("### 🔬 Profile")
+            st.json(profile.report())
+            st.download_button(
+                "⬇️ Download pstats",
+                data=profile_stats_bytes(profile),
+                file_name="ometer.prof",
+                mime="application/octet-stream",
+            )
+    
+    # Performance visualization
+    st.markdown("---")
+    st.markdown("### 📈 Performance Comparison")
+    
+    draw_growth_chart()
+    
+    # Code metrics
+    col3, col4, col5 = st.columns(3)
+    
+    with col3:
+        st.metric("Lines of Code", len(user_code.splitlines()))
+    
+    with col4:
+        st.metric("Functions Found", analysis["functions_found"])
+    
+    with col5:
+        st.metric("Loops Found", analysis["loops_found"])
+
+    # Where the cost is: every function and loop nest, costliest first
+    if analysis["hotspots"]:
+        st.markdown("### 🔥 Hotspots")
+        st.dataframe(
+            [
+                {
+                    "Complexity": entry["complexity"],
+                    "Kind": entry["kind"],
+                    "Name": entry["name"] if entry["kind"] == "function"
+                    else f'{entry["name"]} in {entry["function"] or "top level"}',
+                    "Lines": f'{entry["start_line"]}-{entry["end_line"]}',
+                    "Depth": entry["depth"],
+                    "Log factors": entry["log_factors"],
+                    "Recursion": entry["recursion"] or "",
+                }
+                for entry in analysis["hotspots"]
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Baseline regression gate.
+
+The first run records the complexity of every function in the tree; later runs
+re-analyze only the files whose content changed and fail when a function moved
+up the complexity ordering (O(N) -> O(N^2), O(N^2) -> O(2^N), ...):
+
+    python Script.py src/ --baseline complexity.json          # record, then check
+    python Script.py src/ --baseline complexity.json --update-baseline
+
+A file counts as unchanged when its size and mtime match the baseline, or failing
+that when its SHA-256 does, so a 40k-file tree mostly costs one stat() per file.
+"""
+import hashlib
+import json
+import os
+import sys
+from typing import Callable, Dict, Iterable, List, Optional
+
+from cache import ANALYZER_VERSION
+
+
+# Bump when the layout of the baseline file changes
+FORMAT_VERSION = 1
+
+
+def digest(path: str) -> str:
+    """SHA-256 of the raw bytes of a file"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _key(path: str) -> str:
+    """Baseline key of a path, so src/a.c, ./src/a.c and /abs/src/a.c share one entry"""
+    path = os.path.abspath(path)
+    try:
+        return os.path.relpath(path)
+    except ValueError:  # Another drive than the working directory on Windows
+        return path
+
+
+def _stat(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def function_classes(entries: List[dict]) -> Dict[str, dict]:
+    """{function: {"complexity", "cost", "line"}} from hotspot report entries"""
+    return {e["name"]: {"complexity": e["complexity"], "cost": e["cost"], "line": e["start_line"]}
+            for e in entries if e["kind"] == "function"}
+
+
+def load(path: str) -> Optional[dict]:
+    """Recorded files of a baseline; empty when it is missing, None when it was written by other analyzers"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if data.get("version") != FORMAT_VERSION or data.get("analyzer_version") != ANALYZER_VERSION:
+        # Older results cannot be compared with new ones
+        return None
+    return {_key(path): known for path, known in data["files"].items()}
+
+
+def save(path: str, files: dict):
+    data = {"version": FORMAT_VERSION, "analyzer_version": ANALYZER_VERSION, "files": files}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)  # Never leave a half-written baseline behind
+
+
+def regressions(path: str, old: Dict[str, dict], new: Dict[str, dict]) -> List[str]:
+    """One message per function of path whose cost went up"""
+    found = []
+    for name, now in sorted(new.items(), key=lambda item: item[1]["line"]):
+        before = old.get(name)
+        # Cost tuples order like COMPLEXITY_ORDER and also rank classes it does not list
+        if before is not None and tuple(now["cost"]) > tuple(before["cost"]):
+            found.append(f"{path}:{name} (line {now['line']}): {before['complexity']} -> {now['complexity']}")
+    return found
+
+
+def run(paths: Iterable[str], baseline_path: str, analyze: Callable[[List[str]], Iterable[dict]],
+        update: bool = False, err=sys.stderr) -> int:
+    """
+    Check paths against the baseline, analyzing changed files with analyze(paths),
+    which yields results carrying "path" and a hotspot "report".
+    The baseline is written when it did not exist or update is set.
+    Returns the exit code: 1 when any function regressed, 2 when a file could not
+    be read or analyzed, or when the baseline was recorded by another analyzer
+    version and update is not set, else 0.
+    """
+    recording = not os.path.exists(baseline_path)
+    recorded = load(baseline_path)
+    if recorded is None:
+        if not update:
+            # Nothing could be compared, so passing would silently disable the gate
+            print(f"error: {baseline_path} was recorded by another analyzer version and cannot be "
+                  f"checked; re-record it with --update-baseline", file=err)
+            return 2
+        print(f"warning: {baseline_path} was recorded by another analyzer version; "
+              f"re-recording it without checking for regressions", file=err)
+        recorded = {}
+    files = {}
+    changed = []
+    errors = 0
+    for path in dict.fromkeys(map(_key, paths)):
+        known = recorded.get(path)
+        try:
+            stat = _stat(path)
+            if known is not None and known["stat"] == stat:
+                files[path] = known
+                continue
+            sha = digest(path)
+        except OSError as e:
+            print(f"error: {path}: {e}", file=err)
+            errors += 1
+            continue
+        if known is not None and known["sha256"] == sha:
+            # Touched but not edited: keep the results, remember the new stat
+            files[path] = dict(known, stat=stat)
+            continue
+        files[path] = {"stat": stat, "sha256": sha, "functions": {}}
+        changed.append(path)
+
+    found = []
+    for result in analyze(changed):
+        path = result["path"]
+        if "error" in result:
+            print(f"error: {path}: {result['error']}", file=err)
+            errors += 1
+            del files[path]
+            continue
+        functions = function_classes(result["report"])
+        files[path]["functions"] = functions
+        if path in recorded:
+            found.extend(regressions(path, recorded[path]["functions"], functions))
+
+    # Deleted or renamed files; their functions are dropped once the baseline is rewritten
+    gone = sorted(path for path in recorded if path not in files and not os.path.exists(path))
+    for path in gone:
+        print(f"warning: {path} is in the baseline but no longer exists", file=err)
+
+    for message in sorted(found):
+        print("REGRESSION " + message, file=err)
+    print(f"{len(files)} files, {len(changed)} analyzed, {len(found)} regressions"
+          + (f", {errors} errors" if errors else "") + (f", {len(gone)} gone" if gone else ""), file=err)
+    if recording or update:
+        save(baseline_path, files)
+    if found:
+        return 1
+    # A file that was not checked could hide a regression
+    return 2 if errors else 0
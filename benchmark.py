@@ -0,0 +1,243 @@
+"""
+Benchmark harness for the O-meter analyzers.
+
+Generates synthetic C/C++ workloads at increasing sizes, times each analyzer and
+the full pipeline on them, and writes the results as JSON so runs can
+be compared for regressions:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import core
+
+
+# ---------------------------------------------------------------------------
+# Workload generators: each returns C source of roughly `lines` lines
+# ---------------------------------------------------------------------------
+
+def deep_nesting(lines: int, depth: int = 6) -> str:
+    """Functions made of deep for/while nests, some of them logarithmic"""
+    out = []
+    count = 0
+    while count < lines:
+        out.append(f"void nest{count}(int n) {{")
+        for d in range(depth):
+            indent = "    " * (d + 1)
+            if d % 3 == 2:
+                out.append(f"{indent}int v{d} = n;")
+                out.append(f"{indent}while (v{d} > 1) {{")
+                out.append(f"{indent}    v{d} /= 2;")
+            else:
+                out.append(f"{indent}for (int i{d} = 0; i{d} < n; i{d}++) {{")
+        out.append("    " * (depth + 1) + "total += 1;")
+        for d in reversed(range(depth)):
+            out.append("    " * (d + 1) + "}")
+        out.append("}")
+        count += 2 * depth + 3 + depth // 3
+    return "\n".join(out) + "\n"
+
+
+def many_functions(lines: int) -> str:
+    """Thousands of small functions calling each other, no recursion"""
+    out = []
+    for i in range(max(lines // 4, 1)):
+        out.append(f"int helper{i}(int x) {{")
+        out.append(f"    int y = x * {i % 7 + 1};")
+        out.append(f"    return helper{i - 1}(y) + {i};" if i else "    return y;")
+        out.append("}")
+    return "\n".join(out) + "\n"
+
+
+def recursion_heavy(lines: int) -> str:
+    """Mix of linear, branching and in-loop recursion"""
+    templates = [
+        "int fact{i}(int n) {{\n    if (n <= 1) return 1;\n    return n * fact{i}(n - 1);\n}}",
+        "int fib{i}(int n) {{\n    if (n <= 1) return n;\n    return fib{i}(n - 1) + fib{i}(n - 2);\n}}",
+        "void perm{i}(int *a, int n) {{\n    for (int k = 0; k < n; k++) {{\n"
+        "        swap(a, k, n - 1);\n        perm{i}(a, n - 1);\n    }}\n}}",
+    ]
+    out = []
+    count = 0
+    i = 0
+    while count < lines:
+        text = templates[i % len(templates)].format(i=i)
+        out.append(text)
+        count += text.count("\n") + 1
+        i += 1
+    return "\n".join(out) + "\n"
+
+
+def long_line_bodies(lines: int, width: int = 500) -> str:
+    """Whole function bodies on one line, with many loop headers and a trailing
+    recursive call -- the shape that made the old recursion-in-loop regex backtrack"""
+    header = "for (i = 0; i < n; i++) { x = x + 1; } "
+    repeat = max(width // len(header), 1)
+    out = []
+    for i in range(max(lines // 2, 1)):
+        out.append(f"void flat{i}(int n) {{ " + header * repeat + f"flat{i}(n - 1); }}")
+        out.append("")
+    return "\n".join(out) + "\n"
+
+
+def comment_heavy(lines: int) -> str:
+    """Loops and calls hidden in comments around a little real code"""
+    out = []
+    count = 0
+    i = 0
+    while count < lines:
+        out.append("/*")
+        out.append(f" * for (int i = 0; i < n; i++) {{ walk{i}(n); }}")
+        out.append(" * while (n > 1) { n /= 2; }")
+        out.append(" */")
+        out.append(f"int walk{i}(int n) {{ // walk{i}(n - 1); for (;;) {{")
+        out.append(f"    return n + {i}; /* walk{i}(n) */")
+        out.append("}")
+        count += 7
+        i += 1
+    return "\n".join(out) + "\n"
+
+
+WORKLOADS = {
+    "deep_nesting": deep_nesting,
+    "many_functions": many_functions,
+    "recursion_heavy": recursion_heavy,
+    "long_line_bodies": long_line_bodies,
+    "comment_heavy": comment_heavy,
+}
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+TARGETS = {
+    "analyze_exponential": core.analyze_exponential,
+    "analyze_logarithmic": core.analyze_logarithmic,
+    "analyze_recursion": core.analyze_recursion,
+    "pipeline": core.run_analyzers,
+}
+
+
+def _quiet(func, code):
+    # analyze_recursion prints its findings; keep that off the terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return func(code)
+
+
+def measure(func, code: str, repeat: int) -> dict:
+    """Best wall time over `repeat` runs, then peak traced memory of one more run"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _quiet(func, code)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        _quiet(func, code)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    lines = code.count("\n") + 1
+    return {
+        "seconds": best,
+        "lines_per_s": lines / best if best else None,
+        "bytes_per_s": len(code) / best if best else None,
+        "peak_bytes": peak,
+    }
+
+
+def run(workloads, sizes, repeat: int, log=sys.stderr) -> dict:
+    results = []
+    for name in workloads:
+        for size in sizes:
+            code = WORKLOADS[name](size)
+            for target, func in TARGETS.items():
+                row = {
+                    "workload": name,
+                    "size": size,
+                    "lines": code.count("\n") + 1,
+                    "bytes": len(code),
+                    "target": target,
+                }
+                row.update(measure(func, code, repeat))
+                results.append(row)
+                print(f"{name:>17} {size:>8} {target:>20} {row['seconds'] * 1000:10.2f} ms "
+                      f"{row['lines_per_s']:>12,.0f} lines/s {row['peak_bytes'] / 1e6:8.1f} MB",
+                      file=log)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Rows that got slower than the baseline by more than threshold (0.2 = 20%)"""
+    before = {(r["workload"], r["size"], r["target"]): r for r in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = before.get((row["workload"], row["size"], row["target"]))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = row["seconds"] / old["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append({
+                "workload": row["workload"],
+                "size": row["size"],
+                "target": row["target"],
+                "before_s": old["seconds"],
+                "after_s": row["seconds"],
+                "ratio": ratio,
+            })
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the O-meter analyzers on synthetic C/C++ workloads.")
+    parser.add_argument("--workloads", nargs="+", choices=sorted(WORKLOADS), default=list(WORKLOADS),
+                        help="workloads to run (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 50000],
+                        help="approximate input sizes in lines (default: 1000 10000 50000)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement, best is kept")
+    parser.add_argument("--output", "-o", default=None, help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", default=None,
+                        help="JSON from an earlier run; exit with status 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown ratio counted as a regression (default: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    report = run(args.workloads, args.sizes, args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['workload']} {r['size']} {r['target']}: "
+                  f"{r['before_s'] * 1000:.2f} ms -> {r['after_s'] * 1000:.2f} ms ({r['ratio']:.2f}x)",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
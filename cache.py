@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+
+# Bump whenever an analyzer change can alter results, so stale entries are never reused
+ANALYZER_VERSION = "5"
+
+# Bump when the way keys are computed changes, so no old key can name a new source
+KEY_FORMAT = "2"
+
+# Default budget of the in-memory tier, measured on the JSON size of the results
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def source_key(code: str) -> str:
+    """Content address of a snippet: hash of the analyzer version and normalized UTF-8 source"""
+    lines = code.encode("utf-8", "surrogatepass").split(b"\n")
+    if not lines[-1]:
+        lines.pop()  # A final line ending starts no line, as in lexer.iter_lines()
+    return source_key_lines(lines)
+
+
+def source_key_lines(lines: Iterable[bytes]) -> str:
+    """
+    source_key() computed from the raw bytes of a source, one line at a time, so
+    large files can be hashed without reading them into memory. Lines are split
+    at b"\n" only, as the lexer splits them; their endings and trailing blanks are
+    normalized away since they never change a result.
+    """
+    digest = hashlib.sha256(f"{ANALYZER_VERSION}/{KEY_FORMAT}".encode())
+    separator = b"\0"
+    for line in lines:
+        digest.update(separator)
+        digest.update(line.rstrip(b" \t\r\n"))
+        separator = b"\n"
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of analysis results keyed by source_key().
+    The memory tier is an LRU bounded by the total size of its entries.
+    The optional disk tier is a SQLite file shared between processes and runs.
+    Results must be JSON-serializable and are shared, not copied, on a memory hit.
+    Callers storing a different result shape pass a namespace, so two of them can
+    share one SQLite file without ever reading each other's entries.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, path: Optional[str] = None, namespace: str = ""):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (result, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+
+    def _connection(self):
+        # Connections do not survive fork, so every worker process opens its own
+        if self._db is None or self._db_pid != os.getpid():
+            import sqlite3  # Only needed when the disk tier is in use
+
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _remember(self, key: str, result, size: int):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= old[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (result, size)
+        self._size += size
+        # Evict least recently used entries until the budget holds again
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= evicted
+
+    def _stored(self, key: str) -> str:
+        return f"{self.namespace}:{key}" if self.namespace else key
+
+    def get(self, key: str):
+        key = self._stored(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if self.path is not None:
+                row = self._connection().execute(
+                    "SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._remember(key, result, len(row[0]))
+                    self.hits += 1
+                    return result
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result):
+        key = self._stored(key)
+        value = json.dumps(result)
+        with self._lock:
+            self._remember(key, result, len(value))
+            if self.path is not None:
+                db = self._connection()
+                db.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, value))
+                db.commit()
+
+    def get_or_compute(self, code: str, compute: Callable[[str], object]):
+        """Return the cached result for code, computing and storing it on a miss"""
+        key = source_key(code)
+        result = self.get(key)
+        if result is None:
+            result = compute(code)
+            self.put(key, result)
+        return result
+
+    def clear(self):
+        """Drop the memory tier. The disk tier is left alone."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -0,0 +1,211 @@
+"""
+Call-graph complexity propagation.
+
+Every function body is summarized once: the costliest loop nest it contains and,
+per callee, the costliest loop context around its calls. Costs then flow from
+callees to callers over the strongly connected components of the call graph,
+callees first, so a loop calling a linear helper costs O(N^2). A component that
+calls back into itself is recursion:
+
+    a call into the component from inside a loop  -> O(N!)
+    two or more calls into it from one function   -> O(2^N)
+    a single call                                 -> body cost times N
+
+Costs are (tier, linear, logs) tuples compared as tuples; tiers above POLY
+absorb everything polynomial.
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple
+
+from lexer import Call, Function, Loop
+
+
+# Pseudo-function holding the loops and calls outside any function body
+TOP_LEVEL = "<top level>"
+
+# Cost tiers
+POLY = 0
+EXP = 1    # O(2^N)
+FACT = 2   # O(N!)
+
+ZERO = (POLY, 0, 0)
+
+
+class Summary(NamedTuple):
+    own: tuple     # (linear, logs) of the costliest loop nest in the body
+    calls: dict    # callee -> (linear, logs, count): costliest loop context around its calls, how many
+
+
+def load_summaries(data: dict) -> Dict[str, Summary]:
+    """Summaries back from their JSON form, where every tuple became a list"""
+    return {name: Summary(tuple(own), {callee: tuple(context) for callee, context in calls.items()})
+            for name, (own, calls) in data.items()}
+
+
+def summarize(calls: Iterable[Call], loops: Iterable[Loop]) -> Summary:
+    """Summary of one body from its calls and the loops inside it"""
+    loops = sorted(loops, key=lambda loop: loop.start)
+    own = max(((loop.linear, loop.logs) for loop in loops), default=(0, 0))
+
+    summary_calls = {}
+    stack = []  # Enclosing loops: (end, linear, logs) with the counts of the whole path
+    i = 0
+    for call in sorted(calls, key=lambda call: call.start):
+        # Loops are properly nested, so one sweep finds the path around every call
+        while i < len(loops) and loops[i].start < call.start:
+            loop = loops[i]
+            i += 1
+            while stack and stack[-1][0] < loop.start:
+                stack.pop()
+            linear, logs = stack[-1][1:] if stack else (0, 0)
+            stack.append((loop.end, linear + (not loop.is_log), logs + loop.is_log))
+        while stack and stack[-1][0] < call.start:
+            stack.pop()
+        context = stack[-1][1:] if stack else (0, 0)
+
+        known = summary_calls.get(call.name)
+        if known is None:
+            summary_calls[call.name] = (context[0], context[1], 1)
+        else:
+            summary_calls[call.name] = max(known[:2], context) + (known[2] + 1,)
+    return Summary(own, summary_calls)
+
+
+def summarize_source(index: Dict[str, Function], top_calls: List[Call], loops: List[Loop]) -> Dict[str, Summary]:
+    """Summaries of every indexed function and of the top level, from one token pass"""
+    loops = sorted(loops, key=lambda loop: loop.start)
+    starts = [loop.start for loop in loops]
+    inside = [False] * len(loops)
+    summaries = {}
+    for name, function in index.items():
+        first = bisect_left(starts, function.start)
+        last = bisect_left(starts, function.end)
+        for i in range(first, last):
+            inside[i] = True
+        summaries[name] = summarize(function.calls, loops[first:last])
+    summaries[TOP_LEVEL] = summarize(top_calls, [loop for loop, taken in zip(loops, inside) if not taken])
+    return summaries
+
+
+def merge_summaries(first: Summary, second: Summary) -> Summary:
+    """One summary for two pieces of the same scope, such as top-level code split in blocks"""
+    calls = dict(first.calls)
+    for name, (linear, logs, count) in second.calls.items():
+        known = calls.get(name)
+        if known is None:
+            calls[name] = (linear, logs, count)
+        else:
+            calls[name] = max(known[:2], (linear, logs)) + (known[2] + count,)
+    return Summary(max(tuple(first.own), tuple(second.own)), calls)
+
+
+def compose(context: tuple, cost: tuple) -> tuple:
+    """Cost of running cost inside loops with the given (linear, logs) context"""
+    if cost[0] != POLY:
+        return cost
+    return (POLY, context[0] + cost[1], context[1] + cost[2])
+
+
+def components(graph: Dict[str, Summary]) -> Iterable[List[str]]:
+    """Strongly connected components, callees before callers (iterative Tarjan)"""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    counter = 0
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root].calls))]
+        while work:
+            node, callees = work[-1]
+            for callee in callees:
+                if callee not in graph:
+                    continue  # Library or unknown function, costs nothing here
+                if callee not in index:
+                    index[callee] = low[callee] = counter
+                    counter += 1
+                    stack.append(callee)
+                    on_stack.add(callee)
+                    work.append((callee, iter(graph[callee].calls)))
+                    break
+                if callee in on_stack:
+                    low[node] = min(low[node], index[callee])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    yield component
+
+
+def scope_cost(summary: Summary, costs: Dict[str, tuple], skip=()) -> tuple:
+    """Cost of one body given the costs of its callees; calls to names in skip are left out"""
+    cost = (POLY,) + tuple(summary.own)
+    for callee, (linear, logs, count) in summary.calls.items():
+        if callee not in skip and callee in costs:
+            cost = max(cost, compose((linear, logs), costs[callee]))
+    return cost
+
+
+# Recursion class of a component -> complexity of the recursion alone
+RECURSION = {"loop": "O(N!)", "multiple": "O(2^N)", "single": "O(N)"}
+
+
+def propagate(summaries: Dict[str, Summary], costs: Dict[str, tuple] = None,
+              recursion: Dict[str, str] = None) -> Dict[str, tuple]:
+    """
+    Total cost of every function, callees composed into callers. Each component
+    is costed once; pass costs to reuse and extend the results of an earlier call.
+    When recursion is given, it receives the RECURSION class of every recursive function.
+    """
+    if costs is None:
+        costs = {}
+    for component in components(summaries):
+        if all(name in costs for name in component):
+            continue
+        members = set(component)
+        base = ZERO
+        in_loop = False
+        most = 0  # Most calls into the component made by one member
+        for name in component:
+            summary = summaries[name]
+            base = max(base, scope_cost(summary, costs, skip=members))
+            into = 0
+            for callee, (linear, logs, count) in summary.calls.items():
+                if callee in members:
+                    into += count
+                    in_loop = in_loop or (linear, logs) > (0, 0)
+            most = max(most, into)
+
+        kind = None
+        if in_loop:
+            kind, cost = "loop", max(base, (FACT, 0, 0))
+        elif most >= 2:
+            kind, cost = "multiple", max(base, (EXP, 0, 0))
+        elif most == 1:
+            kind, cost = "single", compose((1, 0), base)  # N levels of recursion, each paying the body
+        else:
+            cost = base
+        for name in component:
+            costs[name] = cost
+            if recursion is not None and kind is not None:
+                recursion[name] = kind
+    return costs
+
+
+def worst_cost(summaries: Dict[str, Summary]) -> tuple:
+    """Costliest function or top-level code"""
+    return max(propagate(summaries).values(), default=ZERO)
@@ -0,0 +1,596 @@
+"""
+The analyzers shared by the CLI, batch workers and the web app.
+
+Nothing outside the standard library is imported here: besides heapq, math, os and
+re, only the project's own pure-Python modules (lexer, ir, callgraph, report,
+profiling and cache for source_key), so processes that just analyze code start
+fast and stay small. Streamlit, pandas and NumPy are never loaded.
+"""
+import heapq
+import math
+import os
+import re
+
+import callgraph
+import ir
+import profiling
+import report
+from cache import source_key
+from lexer import FunctionIndexer, SourceWindow, blank, blank_lines, iter_lines, iter_loops, iter_tokens
+
+
+@profiling.timed("analyze_exponential")
+def analyze_exponential(code: str, program: ir.Program = None) -> str:
+    
+    # Loop nests come from the shared representation, so each loop is seen once
+    # with its real nesting instead of guessing depth from lines with braces
+    if program is None:
+        program = ir.build(code)
+
+    # Costliest nest: number of linear loops, then number of logarithmic loops
+    linear, logs = program.nest()
+    return nest_complexity(linear, logs)
+
+
+def nest_complexity(linear: int, logs: int) -> str:
+    """Complexity of a loop nest with the given number of linear and logarithmic loops"""
+    # Decide complexity from the costliest nest
+    if linear == 0 and logs == 0:
+        return "O(1)"
+    else:
+        time_complexity = ""
+        if linear == 0:
+            time_complexity = "log N"  # Only logarithmic loops
+        elif linear == 1:
+            if logs:
+                time_complexity = "NLogN"  # Linear loop around a logarithmic one
+            else:
+                time_complexity = "N"     # Single linear loop
+        else:
+            if logs:
+                time_complexity = f"N^{linear}LogN"  # Linear nest with a logarithmic loop inside
+            else:
+                time_complexity = f"N^{linear}"
+
+        return f"O({time_complexity})"
+    
+
+@profiling.timed("analyze_logarithmic")
+def analyze_logarithmic(code: str, program: ir.Program = None) -> str:
+    """
+    Simplified function to detect O(log N) complexity patterns.
+    Detects these patterns:
+    1. for(type var=init; var<n; var*=2)
+    2. while(var<n) { var*=2; }
+    3. while(var) { var/=2; }
+    """
+    if program is None:
+        program = ir.build(code)
+
+    # Return O(log N) if any loop moves its variable geometrically
+    if program.log_loop:
+        return "O(log N)"
+    else:
+        return "O(1)"
+
+
+@profiling.timed("analyze_recursion")
+def analyze_recursion(code: str, program: ir.Program = None, index: dict = None, log=print) -> str:
+    # Detect recursive calls (function calling itself)
+    # Findings are reported line by line through log (print by default; the web app collects them)
+    # The function index gives every body span and the calls inside it in one pass
+    if index is None:
+        if program is None:
+            program = ir.build(code)
+        index = program.functions
+
+    detected = "O(1)"  # Default if no recursion found
+
+    for func, info in index.items():
+        # Look for recursive calls inside the function (comments and strings never produce call tokens)
+        calls = [call for call in info.calls if call.name == func]
+
+        if calls:
+            func_body_no_comments = _preview(code[info.start:info.end])
+            matches = [code[call.start:call.end] for call in calls]
+
+            # Print the recursive calls found (for debugging)
+            log(f"Found recursive calls in {func}: {matches}")
+            log(f"Function body (no comments): {func_body_no_comments}...")
+            
+            # Case 3: Recursive call inside a loop -> O(N!) (check this first)
+            # (the index records how many loop bodies enclose each call, so this is a
+            # linear structural check that covers for/while/do loops at any depth)
+            if any(call.loop_depth > info.loop_depth for call in calls):
+                detected = "O(N!)"
+                log(f"  -> Found recursive call inside loop: O(N!)")
+            
+            # Case 1: Single recursive call -> O(N)
+            elif len(matches) == 1:
+                detected = "O(N)"
+                log(f"  -> Single recursive call: O(N)")
+
+            # Case 2: Multiple recursive calls -> O(2^N) (like Fibonacci)
+            elif len(matches) >= 2:
+                detected = "O(2^N)"
+                log(f"  -> Multiple recursive calls: O(2^N)")
+
+    return detected
+
+
+@profiling.timed("analyze_callgraph")
+def analyze_callgraph(code: str, program: ir.Program = None) -> str:
+    # Loop nests and recursion across function boundaries: every body is summarized
+    # once, then callee costs are composed into their callers over the call graph
+    if program is None:
+        program = ir.build(code)
+    return cost_complexity(callgraph.worst_cost(program.summaries()))
+
+
+def cost_complexity(cost: tuple) -> str:
+    """Complexity string of a callgraph (tier, linear, logs) cost"""
+    tier, linear, logs = cost
+    if tier == callgraph.FACT:
+        return "O(N!)"
+    if tier == callgraph.EXP:
+        return "O(2^N)"
+    return nest_complexity(linear, logs)
+
+
+def _preview(body: str, length: int = 200) -> str:
+    """First characters of a function body with comments and literals blanked"""
+    # Only as many lines are blanked as the preview needs
+    parts = []
+    shown = 0
+    for line in blank_lines(iter_lines(body)):
+        parts.append(line)
+        if shown or line.strip():
+            shown += len(line)
+            if shown > length:
+                break
+    return "".join(parts).strip()[:length]
+
+
+# Time complexities in ascending order, used to pick the worst case
+COMPLEXITY_ORDER = ["O(1)", "O(log N)", "O(N)", "O(NLogN)", "O(N^2)", "O(N^2LogN)", "O(N^3)", "O(N^4)", "O(2^N)", "O(N!)"]
+
+# Growth function of every class in COMPLEXITY_ORDER
+GROWTH = {
+    "O(1)": lambda n: 1.0,
+    "O(log N)": lambda n: math.log2(n),
+    "O(N)": lambda n: float(n),
+    "O(NLogN)": lambda n: n * math.log2(n),
+    "O(N^2)": lambda n: float(n) ** 2,
+    "O(N^2LogN)": lambda n: float(n) ** 2 * math.log2(n),
+    "O(N^3)": lambda n: float(n) ** 3,
+    "O(N^4)": lambda n: float(n) ** 4,
+    "O(2^N)": lambda n: 2.0 ** n,
+    "O(N!)": lambda n: math.exp(math.lgamma(n + 1)),  # Overflows at once instead of computing huge factorials
+}
+
+
+def growth_curves(n_values, classes=COMPLEXITY_ORDER) -> dict:
+    """{complexity: [growth at every n]}; values too large for a float are inf"""
+    curves = {}
+    for complexity in classes:
+        values = []
+        for n in n_values:
+            try:
+                values.append(GROWTH[complexity](n))
+            except OverflowError:
+                values.append(math.inf)
+        curves[complexity] = values
+    return curves
+
+# Result of an analyzer that did not run because an earlier one already proved O(N!)
+SKIPPED = "skipped"
+
+# Analyzer name -> function, in the order they run
+ANALYZERS = {
+    "exponential": analyze_exponential,
+    "logarithmic": analyze_logarithmic,
+    "recursion": analyze_recursion,
+    "callgraph": analyze_callgraph,
+}
+
+
+# Complexity strings as produced by nest_complexity() and cost_complexity()
+_COMPLEXITY_RE = re.compile(r'O\((?:(1)|(log N)|(2\^N)|(N!)|N(?:\^(\d+))?(LogN)?)\)')
+
+
+def complexity_cost(complexity: str) -> tuple:
+    """
+    Callgraph (tier, linear, logs) cost of a complexity string, the inverse of
+    cost_complexity(), so every class an analyzer can return is ranked, including
+    the ones COMPLEXITY_ORDER does not list such as O(N^5) or O(N^3LogN).
+    Raises ValueError for anything else rather than ranking it arbitrarily.
+    """
+    match = _COMPLEXITY_RE.fullmatch(complexity)
+    if match is None:
+        raise ValueError(f"unknown complexity {complexity!r}")
+    one, log, exp, fact, power, log_factor = match.groups()
+    if one:
+        return callgraph.ZERO
+    if log:
+        return (callgraph.POLY, 0, 1)
+    if exp:
+        return (callgraph.EXP, 0, 0)
+    if fact:
+        return (callgraph.FACT, 0, 0)
+    return (callgraph.POLY, int(power or 1), 1 if log_factor else 0)
+
+
+def worst_case(results) -> str:
+    """Return the highest complexity among analyzer results, ranked by cost"""
+    highest_time_complexity = "O(1)" #Initialize max time complexity to O(1)
+    highest_cost = callgraph.ZERO
+    for result in results:
+        if result == SKIPPED:
+            continue
+        cost = complexity_cost(result)
+        if cost > highest_cost:
+            highest_time_complexity, highest_cost = result, cost
+    return highest_time_complexity
+
+
+# Tier 1 scan: loop keywords, names followed by '(' and the braces and semicolons between them
+_PREFILTER_RE = re.compile(r'\b(?:for|while|do)\b|\b([A-Za-z_]\w*)\s*\(|[{};]')
+
+
+def prefilter(code: str, blanked: str = None) -> dict:
+    """
+    Tier 1: the run_analyzers() result of code without loops that never calls
+    a function it defines, or None when the full pipeline is needed.
+    Without loops and without recursion every analyzer answers O(1), so such
+    code (most headers) skips building the IR. Pass blank(code) as blanked to
+    reuse it afterwards, e.g. for ir.build().
+    """
+    if blanked is None:
+        blanked = blank(code)
+    defined = set()
+    called = set()
+    pending = []  # names followed by '(' since the last statement outside a body
+    depth = 0     # brace depth inside the current function body, 0 outside any
+    for match in _PREFILTER_RE.finditer(blanked):
+        name = match.group(1)
+        if name is not None:
+            if depth:
+                called.add(name)
+            else:
+                pending.append(name)
+            continue
+        text = match.group()
+        if text == "{":
+            if depth:
+                depth += 1
+            elif pending:
+                # 'name(...) {': a definition (together with any call in its header)
+                defined.update(pending)
+                pending.clear()
+                depth = 1
+        elif text == "}" or text == ";":
+            if depth and text == "}":
+                depth -= 1
+            elif not depth:
+                # Prototypes and calls in global initializers
+                called.update(pending)
+                pending.clear()
+        else:
+            return None  # A loop keyword
+    if defined & called:
+        return None  # Some function may be part of a call cycle
+    return {"complexity": "O(1)", "analyzers": {name: "O(1)" for name in ANALYZERS}}
+
+
+def run_analyzers(code: str, program: ir.Program = None, exhaustive: bool = False, log=print) -> dict:
+    """
+    Run the analyzers over one snippet and return the per-analyzer results and worst case.
+    Loop-free, recursion-free code is answered by prefilter() without the IR, and the
+    analyzers stop as soon as one proves O(N!); the ones after it report SKIPPED.
+    With exhaustive, every analyzer runs. Recursion findings go to log.
+    """
+    if program is None:
+        blanked = None
+        if not exhaustive:
+            blanked = blank(code)  # Shared with the IR, so the input is still blanked once
+            result = prefilter(code, blanked)
+            if result is not None:
+                return result
+        program = ir.build(code, blanked)  # Single pass over the input, shared by every analyzer
+        del blanked
+    analyzers = dict.fromkeys(ANALYZERS, SKIPPED)
+    for name, func in ANALYZERS.items():
+        analyzers[name] = func(code, program, log=log) if func is analyze_recursion else func(code, program)
+        if analyzers[name] == COMPLEXITY_ORDER[-1] and not exhaustive:
+            break  # Nothing ranks higher, the remaining analyzers cannot change the worst case
+    return {"complexity": worst_case(analyzers.values()), "analyzers": analyzers}
+
+
+def analyze_stream(lines, source=None) -> dict:
+    """
+    Streaming counterpart of run_analyzers() for inputs too large to hold twice in memory.
+    Lines are tokenized once and the loop tracking and function index consume the
+    tokens together, so state stays bounded by the largest function. Only bodies of
+    functions that call themselves are kept as text, for the recursion analysis.
+    When source is given (e.g. a MappedSource) bodies are sliced from it instead.
+    """
+    window = None
+    if source is None:
+        window = source = SourceWindow(lines)
+        lines = window
+
+    # Loops closed since the last function ended, and the body summaries for the call graph
+    loops = []
+    summaries = {}
+
+    def keep_candidates(function):
+        # Every loop closed after the body opened belongs to this function
+        first = len(loops)
+        while first and loops[first - 1].start >= function.start:
+            first -= 1
+        summaries[function.name] = callgraph.summarize(function.calls, loops[first:])
+        del loops[first:]
+
+        if any(call.name == function.name for call in function.calls):
+            if window is not None:
+                window.keep(function.start, function.end)
+            return True
+        return False
+
+    indexer = FunctionIndexer(keep=keep_candidates)
+
+    def indexed(tokens):
+        for tok in tokens:
+            indexer.feed(tok)
+            if window is not None and not indexer.in_function:
+                window.release(tok.pos)
+            yield tok
+
+    linear, logs = 0, 0
+    log_loop = False
+    blanked = profiling.timed_iter("blank", blank_lines, lines)
+    for loop in iter_loops(indexed(iter_tokens(blanked))):
+        linear, logs = max((linear, logs), (loop.linear, loop.logs))
+        log_loop = log_loop or loop.is_log
+        loops.append(loop)
+    index = indexer.finish()
+    summaries[callgraph.TOP_LEVEL] = callgraph.summarize(indexer.top_calls, loops)
+
+    analyzers = {
+        "exponential": nest_complexity(linear, logs),
+        "logarithmic": "O(log N)" if log_loop else "O(1)",
+        "recursion": analyze_recursion(source, index=index),
+        "callgraph": cost_complexity(callgraph.worst_cost(summaries)),
+    }
+    return {"complexity": worst_case(analyzers.values()), "analyzers": analyzers}
+
+
+# Just enough of the token grammar to find top-level statement boundaries
+_BLOCK_SCAN_RE = re.compile(r'\b(?:do|while|else)\b|[{}();]')
+
+
+def split_blocks(code: str) -> list:
+    """
+    Split source into top-level blocks: function definitions and the loose
+    statements between them. Every block ends where the lexer is back at brace
+    depth 0 with nothing open, so analyzing the blocks one by one sees the same
+    loops, functions and calls as analyzing the whole source.
+    """
+    blocks = []
+    start = 0
+    brace = paren = 0
+    open_do = 0      # 'do' bodies at depth 0 still waiting for their 'while'
+    boundary = None  # end of the last complete statement, committed at the next token
+
+    # Scanned with comments and literals blanked; offsets are those of code
+    for match in _BLOCK_SCAN_RE.finditer(blank(code)):
+        text = match.group()
+        if boundary is not None:
+            # 'else' still belongs to the if before it
+            if text != "else":
+                blocks.append(code[start:boundary])
+                start = boundary
+            boundary = None
+
+        if text == "{":
+            brace += 1
+        elif text == "}":
+            brace = max(brace - 1, 0)
+            if brace == 0 and paren == 0 and not open_do:
+                boundary = match.end()
+        elif text == "(":
+            paren += 1
+        elif text == ")":
+            paren = max(paren - 1, 0)
+        elif text == ";":
+            if brace == 0 and paren == 0 and not open_do:
+                boundary = match.end()
+        elif brace == 0 and paren == 0:
+            if text == "do":
+                open_do += 1
+            elif text == "while" and open_do:
+                open_do -= 1
+
+    if start < len(code):
+        blocks.append(code[start:])
+    return blocks
+
+
+def analyze_block(code: str) -> dict:
+    """
+    Analyzer results for one block, in a form that combine_blocks() can merge:
+    the costliest loop nest, whether any loop is logarithmic, and the recursion
+    result, findings and call-graph summary of every function in definition order.
+    """
+    program = ir.build(code)
+    summaries = program.summaries()
+
+    functions = []
+    for name, info in program.functions.items():
+        findings = []
+        recursion = analyze_recursion(code, index={name: info}, log=findings.append)
+        functions.append([name, recursion, findings, summaries[name]])
+
+    return {"nest": list(program.nest()), "log_loop": program.log_loop, "loops": len(program.loops),
+            "functions": functions, "top": summaries[callgraph.TOP_LEVEL], "lines": program.lines,
+            "report": report.collect(code, program)}
+
+
+def combine_blocks(blocks, with_report: bool = True) -> dict:
+    """
+    Merge analyze_block() results, in source order, into the run_analyzers() result.
+    Without with_report the hotspot report is left out, saving its resolution.
+    """
+    linear, logs = 0, 0
+    log_loop = False
+    loops = 0
+    recursion = "O(1)"
+    findings = []
+    seen = set()
+    summaries = {}
+    top = callgraph.summarize([], [])
+    items = []
+    line_offset = 0
+    for block in blocks:
+        linear, logs = max((linear, logs), tuple(block["nest"]))
+        log_loop = log_loop or block["log_loop"]
+        loops += block["loops"]
+        top = callgraph.merge_summaries(top, block["top"])
+        if with_report:
+            for item in block["report"]:
+                if item["kind"] == "function" and item["name"] in seen:
+                    continue
+                # Block line numbers start at the line the block starts on
+                items.append(dict(item, start_line=item["start_line"] + line_offset,
+                                  end_line=item["end_line"] + line_offset))
+            line_offset += block["lines"]
+        for name, result, lines, summary in block["functions"]:
+            # First definition of a name wins, as in FunctionIndexer
+            if name in seen:
+                continue
+            seen.add(name)
+            summaries[name] = summary
+            if result != "O(1)":
+                recursion = result  # The last recursive function decides, as in analyze_recursion()
+                findings.extend(lines)
+    summaries[callgraph.TOP_LEVEL] = top
+
+    analyzers = {
+        "exponential": nest_complexity(linear, logs),
+        "logarithmic": "O(log N)" if log_loop else "O(1)",
+        "recursion": recursion,
+        "callgraph": cost_complexity(callgraph.worst_cost(summaries)),
+    }
+    result = {
+        "complexity": worst_case(analyzers.values()),
+        "analyzers": analyzers,
+        "findings": findings,
+        "functions": len(seen),
+        "loops": loops,
+    }
+    if with_report:
+        result["report"] = report.resolve(items, summaries)
+    return result
+
+
+def analyze_blocks(code: str, known: dict = None, cancelled=None, analyze=None) -> dict:
+    """
+    Incremental run_analyzers(): only blocks not found in known (block key ->
+    analyze_block() result, e.g. from the previous edit) are analyzed. known is
+    updated in place to hold exactly the blocks of this source.
+    cancelled() is polled before each block is analyzed; once it returns True the
+    run stops and returns None, keeping the blocks finished so far in known.
+    With analyze, the missing blocks are handed over in one list instead, e.g. to a
+    sandbox running analyze_chunk(); it may return None when cancelled.
+    """
+    if known is None:
+        known = {}
+    current = {}
+    keys = []
+    missing = {}  # key -> block that has to be analyzed
+    for block in split_blocks(code):
+        key = source_key(block)
+        keys.append(key)
+        if key in current or key in missing:
+            continue
+        result = known.get(key)
+        if result is None:
+            missing[key] = block
+        else:
+            current[key] = result
+
+    if analyze is None:
+        for key, block in missing.items():
+            if cancelled is not None and cancelled():
+                known.update(current)
+                return None
+            current[key] = analyze_block(block)
+    elif missing:
+        results = None if cancelled is not None and cancelled() else analyze(list(missing.values()))
+        if results is None:
+            known.update(current)
+            return None
+        current.update(zip(missing, results))
+
+    known.clear()
+    known.update(current)
+    return combine_blocks([current[key] for key in keys])
+
+
+def available_cores() -> int:
+    """Number of cores this process may run on, the default size of every pool"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on Windows/macOS
+        return os.cpu_count() or 1
+
+
+def plan_chunks(sizes, count: int) -> list:
+    """
+    Indices of sizes grouped into at most count chunks of similar total size,
+    costliest chunk first. Largest items are placed first, each on the lightest
+    chunk so far (LPT), so one huge function gets a worker to itself.
+    """
+    heap = [(0, i, []) for i in range(min(count, len(sizes)))]
+    for index in sorted(range(len(sizes)), key=sizes.__getitem__, reverse=True):
+        load, i, chunk = heapq.heappop(heap)
+        chunk.append(index)
+        heapq.heappush(heap, (load + sizes[index], i, chunk))
+    return [chunk for load, i, chunk in sorted(heap, reverse=True)]
+
+
+def analyze_chunk(blocks) -> list:
+    """Pool worker: analyze_block() of every block of one chunk"""
+    return [analyze_block(block) for block in blocks]
+
+
+def analyze_split(code: str, submit, jobs: int, with_report: bool = True):
+    """
+    Parallel run_analyzers() for one huge source: it is split at function
+    boundaries with split_blocks(), identical blocks are analyzed once and the
+    rest are grouped by size into jobs chunks. submit(blocks) hands a chunk to a
+    worker and returns something whose get() gives analyze_chunk(blocks), as
+    Pool.apply_async does. Returns a callable that waits for the chunks and
+    gives the combine_blocks() result, with the hotspot report when with_report is set.
+    """
+    blocks = split_blocks(code)
+    unique = {}  # block key -> position among the blocks analyzed
+    order = []   # position of every block of the source
+    texts = []
+    for block in blocks:
+        key = source_key(block)
+        if key not in unique:
+            unique[key] = len(texts)
+            texts.append(block)
+        order.append(unique[key])
+    chunks = plan_chunks([len(text) for text in texts], jobs)
+    pending = [(chunk, submit([texts[i] for i in chunk])) for chunk in chunks]
+
+    def result() -> dict:
+        results = [None] * len(texts)
+        for chunk, handle in pending:
+            for i, block_result in zip(chunk, handle.get()):
+                results[i] = block_result
+        return combine_blocks([results[i] for i in order], with_report)
+
+    return result
@@ -0,0 +1,296 @@
+"""
+Differential equivalence harness.
+
+Runs two analysis engines side by side over generated and real C/C++ snippets
+and reports every disagreement, with a minimized repro for each kind:
+
+    python differential.py --count 5000
+    python differential.py --paths src/ --baseline pipeline --engine stream
+
+The default compares the frozen regex analyzers in reference.py with the current
+core.py pipeline, with every analyzer run (the "tiered" engine adds the
+prefilter and the early exit at O(N!)). The deliberate differences from the
+reference are listed in ACCEPTED, so the default run only fails on new ones.
+More can be accepted with --accept ANALYZER:BASELINE:ENGINE, where * matches
+anything (e.g. --accept "exponential:O(N):*"); --strict reports everything.
+"""
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import random
+import sys
+
+import Script
+import core
+import reference
+
+
+# ---------------------------------------------------------------------------
+# Engines: source -> {"complexity": ..., "analyzers": {...}}
+# ---------------------------------------------------------------------------
+
+def reference_engine(code: str) -> dict:
+    analyzers = {
+        "exponential": reference.analyze_exponential(code),
+        "logarithmic": reference.analyze_logarithmic(code),
+        "recursion": reference.analyze_recursion(code),
+    }
+    return {"complexity": core.worst_case(analyzers.values()), "analyzers": analyzers}
+
+
+def pipeline_engine(code: str) -> dict:
+    return core.run_analyzers(code, exhaustive=True)
+
+
+def tiered_engine(code: str) -> dict:
+    return core.run_analyzers(code)  # Prefilter and early exit at O(N!)
+
+
+def stream_engine(code: str) -> dict:
+    return core.analyze_stream(io.StringIO(code))
+
+
+def blocks_engine(code: str) -> dict:
+    return core.analyze_blocks(code)
+
+
+ENGINES = {
+    "reference": reference_engine,
+    "pipeline": pipeline_engine,
+    "stream": stream_engine,
+    "tiered": tiered_engine,
+    "blocks": blocks_engine,
+}
+
+
+def run_engine(engine, code: str) -> dict:
+    """Flatten an engine result to {"complexity": ..., "<analyzer>": ...}, quietly"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = engine(code)
+    flat = {"complexity": result["complexity"]}
+    flat.update(result["analyzers"])
+    return flat
+
+
+# Deliberate differences of the pipeline from reference.py, as ANALYZER:BASELINE:ENGINE
+# patterns. Only applied when the baseline is the reference: engines of the current
+# pipeline must agree with each other exactly.
+ACCEPTED = (
+    # Loops nest by structure (braces, brace-less bodies, do/while) and loops inside
+    # comments or literals no longer count, where the regex counted loop keywords per
+    # brace depth. That changes the loop analyzer, and so the overall answer, in both
+    # directions on almost any nested snippet.
+    "exponential:*:*",
+    "complexity:*:*",
+    # The logarithmic analyzer looks at the loop condition variable and knows do/while,
+    # where the regex matched any *= or /= inside a while body
+    "logarithmic:O(log N):O(1)",
+    "logarithmic:O(1):O(log N)",
+    # Recursion inside a loop is found through comments, brace-less bodies and
+    # logarithmic loops, and single self-calls are no longer taken for recursion in a loop
+    "recursion:*:O(N!)",
+    "recursion:O(N!):O(N)",
+    "recursion:O(N!):O(2^N)",
+    "recursion:O(2^N):O(N)",
+    "recursion:O(N):O(2^N)",
+    "recursion:O(1):O(N)",
+    "recursion:O(1):O(2^N)",
+)
+
+
+def is_accepted(label: str, accepted) -> bool:
+    """Whether a disagreement label matches one of the accepted patterns"""
+    return any(fnmatch.fnmatchcase(label, pattern) for pattern in accepted)
+
+
+# ---------------------------------------------------------------------------
+# Corpus generator
+# ---------------------------------------------------------------------------
+
+def _block(rng, lines, indent, depth, func, variables):
+    """Append a random block of statements"""
+    for _ in range(rng.randint(1, 3)):
+        _statement(rng, lines, indent, depth, func, variables)
+
+
+def _statement(rng, lines, indent, depth, func, variables):
+    pad = "    " * indent
+    choices = ["assign", "assign", "comment"]
+    if depth > 0:
+        choices += ["for", "for_log", "while", "while_log", "do", "if", "braceless"]
+    if func:
+        choices += ["call", "call"]
+    kind = rng.choice(choices)
+    var = variables[indent % len(variables)]
+
+    if kind == "assign":
+        lines.append(pad + rng.choice(["x = x + 1;", "sum += a[i];", "y *= 3;", "t = a[j] / 2;"]))
+    elif kind == "comment":
+        lines.append(pad + rng.choice([
+            "// for (int k = 0; k < n; k++) {",
+            "/* while (n > 1) { n /= 2; } */",
+            f"// {func or 'f'}(n - 1);",
+        ]))
+    elif kind == "call":
+        lines.append(pad + f"{func}(n - 1);")
+    elif kind in ("for", "for_log"):
+        step = f"{var}++" if kind == "for" else f"{var} *= 2"
+        start = "0" if kind == "for" else "1"
+        open_brace = " {" if rng.random() < 0.8 else "\n" + pad + "{"
+        lines.append(pad + f"for (int {var} = {start}; {var} < n; {step}){open_brace}")
+        _block(rng, lines, indent + 1, depth - 1, func, variables)
+        lines.append(pad + "}")
+    elif kind in ("while", "while_log"):
+        cond, step = (f"{var} < n", f"{var}++;") if kind == "while" else (f"{var} > 1", f"{var} /= 2;")
+        lines.append(pad + f"while ({cond}) {{")
+        _block(rng, lines, indent + 1, depth - 1, func, variables)
+        lines.append(pad + "    " + step)
+        lines.append(pad + "}")
+    elif kind == "do":
+        lines.append(pad + "do {")
+        _block(rng, lines, indent + 1, depth - 1, func, variables)
+        lines.append(pad + "    " + f"{var} /= 2;")
+        lines.append(pad + f"}} while ({var} > 1);")
+    elif kind == "if":
+        lines.append(pad + "if (x > 0) {")
+        _block(rng, lines, indent + 1, depth - 1, func, variables)
+        lines.append(pad + "}")
+    else:  # braceless
+        lines.append(pad + f"for (int {var} = 0; {var} < n; {var}++)")
+        _statement(rng, lines, indent + 1, 0, func, variables)
+
+
+def generate_snippet(rng: random.Random, max_depth: int = 4) -> str:
+    """One random snippet: loose statements or a few function definitions"""
+    variables = ["i", "j", "k", "m"]
+    lines = []
+    if rng.random() < 0.3:
+        _block(rng, lines, 0, rng.randint(1, max_depth), None, variables)
+    else:
+        for index in range(rng.randint(1, 3)):
+            func = f"f{index}"
+            lines.append(f"int {func}(int n) {{")
+            lines.append("    if (n <= 1) return 1;")
+            _block(rng, lines, 1, rng.randint(1, max_depth), func, variables)
+            lines.append("    return 0;")
+            lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def load_paths(patterns) -> list:
+    """Real snippets: every C/C++ file matched by the patterns"""
+    snippets = []
+    for path in Script.expand_paths(patterns):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            snippets.append((path, f.read()))
+    return snippets
+
+
+# ---------------------------------------------------------------------------
+# Comparison and minimization
+# ---------------------------------------------------------------------------
+
+def disagreements(baseline, engine, code: str) -> list:
+    """
+    [(key, baseline value, engine value)] for every result that differs.
+    Analyzers the engine skipped, like those after the tiered engine's early exit, are not compared.
+    """
+    expected = run_engine(baseline, code)
+    actual = run_engine(engine, code)
+    return [(key, expected[key], actual.get(key)) for key in expected
+            if expected[key] != actual.get(key) and actual.get(key) != core.SKIPPED]
+
+
+def minimize(code: str, still_fails) -> str:
+    """Delta-debug the snippet line by line while still_fails(candidate) holds"""
+    lines = code.splitlines()
+    chunks = 2
+    while len(lines) >= 2:
+        size = max(len(lines) // chunks, 1)
+        for start in range(0, len(lines), size):
+            candidate = lines[:start] + lines[start + size:]
+            if candidate and still_fails("\n".join(candidate) + "\n"):
+                lines = candidate
+                chunks = max(chunks - 1, 2)
+                break
+        else:
+            if size == 1:
+                break
+            chunks = min(chunks * 2, len(lines))
+    return "\n".join(lines) + "\n"
+
+
+def run_differential(snippets, baseline, engine, accepted=(), log=sys.stderr) -> dict:
+    """
+    Compare the engines over (name, code) pairs. Returns a report grouped by
+    disagreement signature, each with its count and a minimized repro.
+    """
+    groups = {}
+    checked = 0
+    for name, code in snippets:
+        checked += 1
+        for signature in disagreements(baseline, engine, code):
+            label = ":".join(str(part) for part in signature)
+            group = groups.get(label)
+            if group is None:
+                def still_fails(candidate, signature=signature):
+                    return signature in disagreements(baseline, engine, candidate)
+
+                group = groups[label] = {
+                    "signature": label,
+                    "accepted": is_accepted(label, accepted),
+                    "count": 0,
+                    "first": name,
+                    "repro": minimize(code, still_fails),
+                }
+                print(f"new disagreement {label} in {name}", file=log)
+            group["count"] += 1
+    return {"checked": checked, "disagreements": sorted(groups.values(), key=lambda g: -g["count"])}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two O-meter analysis engines over a snippet corpus.")
+    parser.add_argument("--baseline", choices=sorted(ENGINES), default="reference",
+                        help="engine whose answers are expected (default: reference)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="pipeline",
+                        help="engine under test (default: pipeline)")
+    parser.add_argument("--count", type=int, default=2000, help="generated snippets (default: 2000)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus generator seed")
+    parser.add_argument("--paths", nargs="*", default=[], help="real files, directories or globs to include")
+    parser.add_argument("--accept", action="append", default=[], metavar="ANALYZER:BASELINE:ENGINE",
+                        help="disagreement accepted as a deliberate fix, * matches anything (repeatable)")
+    parser.add_argument("--strict", action="store_true",
+                        help="do not apply the built-in ACCEPTED differences from the reference")
+    parser.add_argument("--json", metavar="PATH", default=None, help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    snippets = [(f"generated#{i}", generate_snippet(rng)) for i in range(args.count)]
+    snippets += load_paths(args.paths)
+
+    accepted = list(args.accept)
+    if args.baseline == "reference" and not args.strict:
+        accepted += ACCEPTED
+    report = run_differential(snippets, ENGINES[args.baseline], ENGINES[args.engine], accepted)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failing = [g for g in report["disagreements"] if not g["accepted"]]
+    print(f"{report['checked']} snippets checked, {len(report['disagreements'])} kinds of disagreement, "
+          f"{len(failing)} not accepted")
+    for group in report["disagreements"]:
+        if group["accepted"]:
+            # Repros of accepted differences stay in the --json report
+            print(f"[accepted] {group['signature']} x{group['count']}")
+    for group in failing:
+        print(f"\n[FAIL] {group['signature']} x{group['count']} (first in {group['first']})")
+        print(group["repro"].rstrip())
+    return 1 if failing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Intermediate representation shared by the analyzers, the reports and the app.
+
+build() blanks comments, string and character literals and preprocessor lines
+first, then scans the source once and keeps only what the analyses need: every
+function (span, call sites), every loop (kind, line span, update operator,
+bound variable, nest counts) and the calls outside any function. Tokens are
+consumed as they are produced and never stored, so a 100k-line input costs a
+few MB of nodes instead of a list of millions of tokens.
+
+    program = ir.build(code)
+    program.nest()          # costliest loop nest, (linear, logs)
+    program.summaries()     # call-graph summaries, computed once
+"""
+from typing import Dict, List
+
+import callgraph
+import profiling
+from lexer import Call, Function, FunctionIndexer, Loop, blank, iter_lines, iter_loops, iter_tokens
+
+
+class Program:
+    """Functions, loops and top-level calls of one input"""
+    __slots__ = ("functions", "loops", "top_calls", "lines", "_summaries")
+
+    def __init__(self, functions: Dict[str, Function], loops: List[Loop], top_calls: List[Call], lines: int):
+        self.functions = functions  # name -> Function, first definition of every name
+        self.loops = loops          # every loop in the order it closes, inner loops first
+        self.top_calls = top_calls  # calls outside any function body
+        self.lines = lines
+        self._summaries = None
+
+    def nest(self) -> tuple:
+        """(linear, logs) of the costliest loop nest"""
+        return max(((loop.linear, loop.logs) for loop in self.loops), default=(0, 0))
+
+    @property
+    def log_loop(self) -> bool:
+        """True when any loop moves its variable geometrically"""
+        return any(loop.is_log for loop in self.loops)
+
+    def summaries(self) -> Dict[str, callgraph.Summary]:
+        """Call-graph summaries of every function and of the top level"""
+        if self._summaries is None:
+            self._summaries = callgraph.summarize_source(self.functions, self.top_calls, self.loops)
+        return self._summaries
+
+    def __repr__(self):
+        return f"Program({len(self.functions)} functions, {len(self.loops)} loops, {self.lines} lines)"
+
+
+@profiling.timed("build_ir")
+def build(code: str, blanked: str = None) -> Program:
+    """
+    The Program of a whole source string, from a single token pass.
+    blanked is lexer.blank(code) when the caller already has it, so it is not blanked twice.
+    """
+    indexer = FunctionIndexer()
+    feed = indexer.feed
+
+    def indexed(tokens):
+        for tok in tokens:
+            feed(tok)
+            yield tok
+
+    if blanked is None:
+        blanked = blank(code)  # Whole, so the profile reports blanking apart from the token pass
+    lines = iter_lines(blanked)
+    loops = list(iter_loops(indexed(iter_tokens(lines))))
+    functions = indexer.finish()
+    return Program(functions, loops, indexer.top_calls, code.count("\n"))
@@ -0,0 +1,556 @@
+import re
+import sys
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple
+
+import profiling
+
+
+# Token kinds produced by the tokenizer
+IDENT = "ident"      # plain identifier or keyword
+CALL = "call"        # identifier directly followed by '(' (call site or definition)
+UPDATE = "update"    # ++ -- += -= *= /= <<= >>=
+COMPARE = "compare"  # < <= > >= == !=
+LPAREN = "("
+RPAREN = ")"
+LBRACE = "{"
+RBRACE = "}"
+SEMI = ";"
+
+# Structural markers inserted by the tokenizer around loops
+LOOP = "loop"        # start of a for/while/do loop (text is the keyword)
+BODY = "body"        # first token of the loop body follows
+COND = "cond"        # the trailing condition of a do-while loop follows
+END = "end"          # the loop body has ended
+
+# Updates that shrink or grow the loop variable geometrically
+LOG_UPDATES = {"*=", "/=", "<<=", ">>="}
+
+# Words that look like calls when followed by '(' but are not functions
+C_KEYWORDS = {'for', 'while', 'if', 'else', 'switch', 'case', 'do', 'return',
+              'break', 'continue', 'goto', 'sizeof'}
+
+# Comments and literals on one line; a block comment left open continues on the next
+_BLANK_RE = re.compile(r"""
+      //.*
+    | /\*.*?\*/
+    | (?P<open>/\*.*)
+    | "(?:\\.|[^"\\\n])*(?:"|$)
+    | '(?:\\.|[^'\\\n])*(?:'|$)
+""", re.VERBOSE)
+
+_SPECIAL_RE = re.compile(r'[/"\']')
+
+# Tokens of blanked source, see blank_lines()
+_TOKEN_RE = re.compile(r"""
+      (?P<ident>[A-Za-z_]\w*)
+    | (?P<number>\d[\w.]*)                  # consumed so 1e5 is not read as 'e5'
+    | (?P<update>\+\+|--|<<=|>>=|[-+*/]=)
+    | (?P<skip><<|>>|->)                    # shifts and member access, never comparisons
+    | (?P<compare>[<>!=]=|[<>])
+    | (?P<punct>[{}();])
+""", re.VERBOSE)
+
+# Loop frame states
+_HEAD_WAIT = 0   # saw for/while, waiting for '('
+_HEAD = 1        # inside the loop header parentheses
+_BODY_WAIT = 2   # header closed, next token starts the body
+_BODY = 3        # inside the body
+_TAIL_WAIT = 4   # do body closed, waiting for 'while'
+_TAIL_HEAD = 5   # saw the trailing 'while', waiting for '('
+_TAIL = 6        # inside the do-while condition
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    line: int    # 1-based line number
+    pos: int     # offset of the token in the source
+    depth: int   # brace depth the token sits at
+
+
+class Loop:
+    """A loop of the intermediate representation"""
+    __slots__ = ("kind", "line", "end_line", "is_log", "linear", "logs", "start", "end", "update", "bound")
+
+    def __init__(self, kind: str, line: int, end_line: int, is_log: bool, linear: int, logs: int,
+                 start: int, end: int, update: str = None, bound: str = None):
+        self.kind = kind            # for, while or do
+        self.line = line            # line of the loop keyword
+        self.end_line = end_line    # line the body ends on
+        self.is_log = is_log        # loop variable is multiplied or divided each iteration
+        self.linear = linear        # linear loops on the costliest nest path, this one included
+        self.logs = logs            # logarithmic loops on that same path
+        self.start = start          # offset of the loop keyword
+        self.end = end              # offset where the body ends
+        self.update = update        # operator moving the loop variable (++, *=, ...), None if not seen
+        self.bound = bound          # variable the loop variable is compared with, None for a constant
+
+    def __repr__(self):
+        return f"Loop({self.kind!r}, line={self.line}, end_line={self.end_line}, update={self.update!r}, " \
+               f"bound={self.bound!r}, linear={self.linear}, logs={self.logs})"
+
+
+class Call:
+    """A call site of the intermediate representation"""
+    __slots__ = ("name", "line", "start", "end", "loop_depth")
+
+    def __init__(self, name: str, line: int, start: int, end: int, loop_depth: int):
+        self.name = name
+        self.line = line
+        self.start = start            # offset of the called name
+        self.end = end                # offset just past the closing ')'
+        self.loop_depth = loop_depth  # loop bodies enclosing the call
+
+    def __repr__(self):
+        return f"Call({self.name!r}, line={self.line}, loop_depth={self.loop_depth})"
+
+
+class Function:
+    """A function definition of the intermediate representation"""
+    __slots__ = ("name", "line", "start", "end", "calls", "loop_depth")
+
+    def __init__(self, name: str, line: int, start: int, end: int, calls: List[Call], loop_depth: int):
+        self.name = name
+        self.line = line              # line of the function name
+        self.start = start            # offset just past the opening '{' of the body
+        self.end = end                # offset of the closing '}' of the body
+        self.calls = calls            # call sites inside the body
+        self.loop_depth = loop_depth  # loop bodies enclosing the definition itself
+
+    def __repr__(self):
+        return f"Function({self.name!r}, line={self.line}, calls={len(self.calls)})"
+
+
+def iter_lines(code: str) -> Iterator[str]:
+    """Lines of a string with their endings, sliced one at a time (StringIO would copy it whole)"""
+    find = code.find
+    start = 0
+    end = find("\n")
+    while end >= 0:
+        yield code[start:end + 1]
+        start = end + 1
+        end = find("\n", start)
+    if start < len(code):
+        yield code[start:]
+
+
+def _blank(text: str) -> str:
+    if text.endswith("\n"):
+        return " " * (len(text) - 1) + "\n"
+    return " " * len(text)
+
+
+def blank_lines(lines: Iterable[str], directives: list = None) -> Iterator[str]:
+    """
+    Yield every line with comments, string and char literals and preprocessor
+    lines replaced by spaces. Lengths and line endings are kept, so offsets and
+    line numbers into the original source stay valid. Linear, one scan per line.
+    The preprocessor lines outside comments are appended to directives when given.
+    """
+    in_comment = False
+    directive = False
+    special = _SPECIAL_RE.search
+    for line in lines:
+        start = 0
+        if in_comment:
+            end = line.find("*/")
+            if end < 0:
+                yield _blank(line)
+                continue
+            in_comment = False
+            start = end + 2
+        elif directive or line.lstrip().startswith("#"):
+            # Preprocessor lines, continued by a trailing backslash
+            directive = line.rstrip().endswith("\\")
+            if directives is not None:
+                directives.append(line)
+            yield _blank(line)
+            continue
+
+        if not special(line, start):
+            yield _blank(line[:start]) + line[start:] if start else line
+            continue
+        parts = [_blank(line[:start])]
+        pos = start
+        for match in _BLANK_RE.finditer(line, start):
+            parts.append(line[pos:match.start()])
+            parts.append(_blank(match.group()))
+            pos = match.end()
+            if match.lastgroup == "open":
+                in_comment = True
+        parts.append(line[pos:])
+        yield "".join(parts)
+
+
+@profiling.timed("blank")
+def blank(code: str, directives: list = None) -> str:
+    """blank_lines() of a whole source string"""
+    return "".join(blank_lines(iter_lines(code), directives))
+
+
+def iter_tokens(lines: Iterable[str]) -> Iterator[Token]:
+    """
+    Scan source lines once and yield tokens with brace depth, loop structure,
+    update operators and call sites marked.
+    Lines are expected to come from blank_lines() and keep their line endings,
+    so that offsets stay exact.
+    """
+    brace = 0
+    paren = 0
+    # Open loops, innermost last: [kind, state, paren_mark, body_depth, braced, line, pos]
+    loops = []
+    # Identifier waiting to see whether '(' follows it
+    pending = None
+
+    offset = 0
+    line_no = 0
+    for line in lines:
+        line_no += 1
+        start = 0
+        while True:
+            match = _TOKEN_RE.search(line, start)
+            if not match:
+                break
+            start = match.end()
+            group = match.lastgroup
+            text = match.group()
+            pos = offset + match.start()
+
+            if group == "number" or group == "skip":
+                continue
+
+            # Resolve the identifier seen just before this token
+            if pending is not None:
+                p_text, p_line, p_pos, p_depth = pending
+                pending = None
+                kind = CALL if text == "(" and p_text not in C_KEYWORDS else IDENT
+                yield Token(kind, p_text, p_line, p_pos, p_depth)
+
+            top = loops[-1] if loops else None
+
+            # A loop whose header just closed starts its body with this token
+            if top is not None and top[1] == _BODY_WAIT:
+                top[1] = _BODY
+                top[3] = brace
+                top[4] = text == "{"
+                yield Token(BODY, "", line_no, pos, brace)
+
+            elif top is not None and top[1] == _HEAD_WAIT:
+                if text == "(":
+                    top[1] = _HEAD
+                    top[2] = paren + 1
+                    yield Token(LOOP, top[0], top[5], top[6], brace)
+                else:
+                    # 'for'/'while' not followed by a header, not a loop
+                    loops.pop()
+
+            elif top is not None and top[1] == _TAIL_WAIT:
+                if text == "while":
+                    top[1] = _TAIL_HEAD
+                    continue
+                # do body without a trailing while, close it here
+                loops.pop()
+                yield Token(END, "do", line_no, pos, brace)
+
+            elif top is not None and top[1] == _TAIL_HEAD:
+                if text == "(":
+                    top[1] = _TAIL
+                    top[2] = paren + 1
+                    yield Token(COND, "do", line_no, pos, brace)
+                else:
+                    loops.pop()
+                    yield Token(END, "do", line_no, pos, brace)
+
+            if group == "ident":
+                if text == "for" or text == "while":
+                    loops.append([text, _HEAD_WAIT, 0, 0, False, line_no, pos])
+                elif text == "do":
+                    loops.append([text, _BODY_WAIT, 0, 0, False, line_no, pos])
+                    yield Token(LOOP, text, line_no, pos, brace)
+                else:
+                    pending = (text, line_no, pos, brace)
+                continue
+
+            if group == "update":
+                yield Token(UPDATE, text, line_no, pos, brace)
+                continue
+            if group == "compare":
+                yield Token(COMPARE, text, line_no, pos, brace)
+                continue
+
+            # Punctuation
+            if text == "(":
+                paren += 1
+                yield Token(LPAREN, text, line_no, pos, brace)
+            elif text == ")":
+                yield Token(RPAREN, text, line_no, pos, brace)
+                top = loops[-1] if loops else None
+                if top is not None and top[2] == paren:
+                    if top[1] == _HEAD:
+                        top[1] = _BODY_WAIT
+                    elif top[1] == _TAIL:
+                        loops.pop()
+                        yield Token(END, "do", line_no, pos, brace)
+                paren = max(paren - 1, 0)
+            elif text == "{":
+                yield Token(LBRACE, text, line_no, pos, brace)
+                brace += 1
+            elif text == "}":
+                brace = max(brace - 1, 0)
+                yield Token(RBRACE, text, line_no, pos, brace)
+                # The brace may close a loop body, which in turn may complete
+                # the statement of enclosing brace-less loops
+                while loops and loops[-1][1] == _BODY and (
+                        loops[-1][3] > brace or (loops[-1][4] and loops[-1][3] == brace)):
+                    yield from _finish_loop(loops, line_no, pos, brace)
+                yield from _close_statements(loops, line_no, pos, brace)
+            else:  # ';'
+                yield Token(SEMI, text, line_no, pos, brace)
+                if paren == 0 or not loops or loops[-1][1] != _HEAD:
+                    yield from _close_statements(loops, line_no, pos, brace)
+
+        offset += len(line)
+
+    if pending is not None:
+        p_text, p_line, p_pos, p_depth = pending
+        yield Token(IDENT, p_text, p_line, p_pos, p_depth)
+
+    profile = profiling.current()
+    if profile is not None:
+        profile.count("lines_scanned", line_no)
+        profile.count("bytes_scanned", offset)
+
+    # Close whatever is left open at the end of the input
+    while loops:
+        frame = loops.pop()
+        if frame[1] != _HEAD_WAIT:
+            yield Token(END, frame[0], line_no, offset, brace)
+
+
+_intern = sys.intern
+
+
+def _finish_loop(loops: list, line_no: int, pos: int, brace: int) -> Iterator[Token]:
+    """End the body of the innermost loop. do-loops go on to wait for their while."""
+    frame = loops[-1]
+    if frame[0] == "do":
+        frame[1] = _TAIL_WAIT
+    else:
+        loops.pop()
+        yield Token(END, frame[0], line_no, pos, brace)
+
+
+def _close_statements(loops: list, line_no: int, pos: int, brace: int) -> Iterator[Token]:
+    """End every brace-less loop body whose single statement just finished."""
+    while loops:
+        frame = loops[-1]
+        if frame[1] != _BODY or frame[4] or frame[3] < brace:
+            break
+        yield from _finish_loop(loops, line_no, pos, brace)
+
+
+def iter_loops(tokens: Iterable[Token]) -> Iterator[Loop]:
+    """
+    Yield every loop of a token stream as it closes, inner loops first.
+    A loop is logarithmic when its header updates with *=, /=, <<= or >>=,
+    or when its body does so to a variable named in the header.
+    The first comparison in the header names the bound, e.g. n in i < n.
+    """
+    # Open loops: [kind, line, in_header, header_vars, body_updates, header_log, inner, pos,
+    #              update, bound, compared]
+    stack = []
+    last_ident = None
+    for tok in tokens:
+        kind = tok.kind
+        if kind == IDENT or kind == CALL:
+            last_ident = tok.text
+            if stack and stack[-1][2]:
+                frame = stack[-1]
+                frame[3].add(tok.text)
+                if frame[10] == 1:
+                    frame[9] = tok.text  # First name after the comparison
+                    frame[10] = 2
+        elif kind == COMPARE:
+            if stack and stack[-1][2] and stack[-1][10] == 0:
+                stack[-1][10] = 1
+        elif kind == SEMI:
+            if stack and stack[-1][10] == 1:
+                stack[-1][10] = 2  # Compared with a constant
+        elif kind == UPDATE:
+            if stack:
+                frame = stack[-1]
+                if frame[2]:
+                    if tok.text in LOG_UPDATES:
+                        frame[5] = True
+                    if frame[8] is None or tok.text in LOG_UPDATES:
+                        frame[8] = tok.text
+                elif last_ident is not None and last_ident in frame[3] and frame[8] is None:
+                    frame[8] = tok.text  # while loops move their variable in the body
+                if tok.text in LOG_UPDATES and not frame[2] and last_ident is not None:
+                    for frame in stack:
+                        frame[4].add(last_ident)
+        elif kind == LOOP:
+            stack.append([tok.text, tok.line, tok.text != "do", set(), set(), False, (0, 0), tok.pos,
+                          None, None, 0])
+        elif kind == BODY:
+            stack[-1][2] = False
+        elif kind == COND:
+            stack[-1][2] = True
+        elif kind == END and stack:
+            loop_kind, line, _, header_vars, updates, header_log, inner, start, update, bound, _ = stack.pop()
+            is_log = header_log or not header_vars.isdisjoint(updates)
+            linear, logs = inner
+            if is_log:
+                logs += 1
+            else:
+                linear += 1
+            if stack and (linear, logs) > stack[-1][6]:
+                stack[-1][6] = (linear, logs)
+            # Names are interned: a large input repeats the same few thousand of them
+            yield Loop(_intern(loop_kind), line, tok.line, is_log, linear, logs, start, tok.pos,
+                       update and _intern(update), bound and _intern(bound))
+
+
+class FunctionIndexer:
+    """
+    Builds a name -> Function map, fed one token at a time so it can run
+    alongside other consumers of a single streamed token pass.
+    A definition is a call token whose argument list is followed by '{'.
+    Each call site is recorded in every function body that encloses it,
+    together with the number of loop bodies around it.
+    When a name is defined more than once the first definition is kept.
+    keep, when given, is called with each Function as its body ends and decides
+    whether it is stored; dropped functions still count as the first definition.
+    Calls made outside any function body are collected in top_calls.
+    """
+
+    def __init__(self, keep: Callable[[Function], bool] = None):
+        self.index = {}
+        self.keep = keep
+        self.top_calls = []
+        self._seen = set()
+        # Calls whose argument list is still open: [name, line, pos, paren level, loop depth]
+        self._open_calls = []
+        # Function bodies still open: [name, line, body start, brace depth, calls, loop depth]
+        self._open_functions = []
+        self._paren = 0
+        self._closed = None  # Call whose argument list ended on the previous token
+        # One flag per open loop, True while its body (not its header) is being read
+        self._loops = []
+        self._loop_depth = 0
+
+    @property
+    def in_function(self) -> bool:
+        """True while a function body or a possible definition header is open"""
+        return bool(self._open_functions or self._open_calls or self._closed is not None)
+
+    def feed(self, tok: Token):
+        kind = tok.kind
+        closed = self._closed
+        if closed is not None:
+            if kind == LBRACE:
+                self._open_functions.append([closed.name, closed.line, tok.pos + 1, tok.depth, [],
+                                             closed.loop_depth])
+            else:
+                self._record(closed)
+            self._closed = None
+
+        if kind == CALL:
+            self._open_calls.append([tok.text, tok.line, tok.pos, self._paren + 1, self._loop_depth])
+        elif kind == LOOP:
+            self._loops.append(False)
+        elif kind == BODY:
+            self._loops[-1] = True
+            self._loop_depth += 1
+        elif kind == COND:
+            self._loops[-1] = False
+            self._loop_depth -= 1
+        elif kind == END:
+            if self._loops.pop():
+                self._loop_depth -= 1
+        elif kind == LPAREN:
+            self._paren += 1
+        elif kind == RPAREN:
+            open_calls = self._open_calls
+            if open_calls and open_calls[-1][3] == self._paren:
+                name, line, pos, _, depth = open_calls.pop()
+                call = Call(_intern(name), line, pos, tok.pos + 1, depth)
+                if open_calls:
+                    # Nested call such as f(g(x)), cannot be a definition
+                    self._record(call)
+                else:
+                    self._closed = call
+            self._paren = max(self._paren - 1, 0)
+        elif kind == RBRACE:
+            # An unbalanced argument list never spans a function body
+            self._open_calls.clear()
+            self._paren = 0
+            open_functions = self._open_functions
+            while open_functions and open_functions[-1][3] >= tok.depth:
+                name, line, start, _, calls, depth = open_functions.pop()
+                if name in self._seen:
+                    continue
+                self._seen.add(name)
+                function = Function(name, line, start, tok.pos, calls, depth)
+                if self.keep is None or self.keep(function):
+                    self.index[name] = function
+
+    def _record(self, call: Call):
+        if self._open_functions:
+            for frame in self._open_functions:
+                frame[4].append(call)
+        else:
+            self.top_calls.append(call)
+
+    def finish(self) -> Dict[str, Function]:
+        if self._closed is not None:
+            self._record(self._closed)
+            self._closed = None
+        return self.index
+
+
+class SourceWindow:
+    """
+    Line iterator for streamed input that only keeps the text still needed.
+    Lines are held until release() says they are done with; keep() copies a
+    span (such as a function body) out of the window before it is released.
+    Slicing with source offsets, like a str, returns text from kept spans.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self._lines = lines
+        self._window = []   # [(offset, line)] not released yet
+        self._kept = []     # [(start, end, text)]
+        self.offset = 0     # offset just past the last line read
+
+    def __iter__(self) -> Iterator[str]:
+        for line in self._lines:
+            self._window.append((self.offset, line))
+            self.offset += len(line)
+            yield line
+
+    def release(self, before: int):
+        """Forget every line that ends at or before the offset"""
+        window = self._window
+        drop = 0
+        while drop < len(window) and window[drop][0] + len(window[drop][1]) <= before:
+            drop += 1
+        if drop:
+            del window[:drop]
+
+    def keep(self, start: int, end: int):
+        """Copy the text between two offsets out of the window"""
+        parts = []
+        for offset, line in self._window:
+            if offset + len(line) <= start:
+                continue
+            if offset >= end:
+                break
+            parts.append(line[max(start - offset, 0):end - offset])
+        self._kept.append((start, end, "".join(parts)))
+
+    def __getitem__(self, span: slice) -> str:
+        for start, end, text in self._kept:
+            if start <= span.start and span.stop <= end:
+                return text[span.start - start:span.stop - start]
+        return ""
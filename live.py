@@ -0,0 +1,99 @@
+"""
+Background analysis for the web app's live mode.
+
+The Streamlit script hands every edit to submit() and renders snapshot(). A
+single worker thread per session waits until edits stop for `debounce` seconds,
+then analyzes the latest source. A newer edit cancels the run in flight at the
+next block boundary, and the last complete result stays available meanwhile.
+"""
+import threading
+import time
+from typing import Callable, NamedTuple, Optional
+
+
+# Seconds without edits before an analysis starts
+DEFAULT_DEBOUNCE = 0.4
+
+# An idle worker thread exits after this many seconds; the next edit starts a new one
+IDLE_TIMEOUT = 60.0
+
+
+class Snapshot(NamedTuple):
+    result: Optional[dict]      # last complete result, None before the first one
+    code: Optional[str]         # source the result belongs to
+    pending: bool               # a newer source is waiting or being analyzed
+    error: Optional[Exception]  # what the last run raised, if it failed
+
+
+class LiveWorker:
+    """
+    Debounced, cancellable analysis on a background thread.
+    analyze(code, cancelled) must return the result, or None after cancelled()
+    turned True.
+    """
+
+    def __init__(self, analyze: Callable[[str, Callable[[], bool]], Optional[dict]],
+                 debounce: float = DEFAULT_DEBOUNCE):
+        self._analyze = analyze
+        self.debounce = debounce
+        self._cond = threading.Condition()
+        self._code = None          # latest submitted source
+        self._generation = 0       # bumped by every new submission
+        self._done = 0             # generation of the last finished run
+        self._due = 0.0            # monotonic time the debounce ends
+        self._result = None
+        self._result_code = None
+        self._error = None
+        self._thread = None
+
+    def submit(self, code: str):
+        """Queue code for analysis, cancelling any run for an older source"""
+        with self._cond:
+            if code == self._code:
+                return  # Streamlit reruns resubmit the same text all the time
+            self._code = code
+            self._generation += 1
+            self._due = time.monotonic() + self.debounce
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ometer-live", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def snapshot(self) -> Snapshot:
+        with self._cond:
+            return Snapshot(self._result, self._result_code, self._done != self._generation, self._error)
+
+    def _cancelled(self, generation: int) -> bool:
+        return self._generation != generation
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # Sleep until there is a newer source than the last one analyzed
+                while self._done == self._generation:
+                    if not self._cond.wait(IDLE_TIMEOUT) and self._done == self._generation:
+                        self._thread = None
+                        return
+                # Debounce: every submission pushes the start further out
+                while True:
+                    delay = self._due - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                generation = self._generation
+                code = self._code
+
+            error = None
+            try:
+                result = self._analyze(code, lambda: self._cancelled(generation))
+            except Exception as e:  # Shown in the UI instead of killing the worker
+                result, error = None, e
+
+            with self._cond:
+                if generation != self._generation:
+                    continue  # Superseded while running; go again with the newer source
+                self._done = generation
+                self._error = error
+                if error is None:
+                    self._result = result
+                    self._result_code = code
@@ -0,0 +1,119 @@
+"""
+Load test for service.py.
+
+Opens `--concurrency` keep-alive connections and sends single-snippet requests
+(or batches with --batch) from the benchmark workloads for `--duration` seconds,
+then reports throughput and latency percentiles:
+
+    python service.py --workers 4 &
+    python loadtest.py --concurrency 32 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import benchmark
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def build_corpus(count: int, lines: int, seed: int) -> list:
+    """Distinct snippets, so the service cache does not answer everything"""
+    rng = random.Random(seed)
+    generators = list(benchmark.WORKLOADS.values())
+    return [rng.choice(generators)(lines) + f"// variant {i}\n" for i in range(count)]
+
+
+async def _request(reader, writer, host: str, path: str, payload: dict):
+    body = json.dumps(payload).encode()
+    writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, corpus, batch, deadline, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random()
+    try:
+        while time.perf_counter() < deadline:
+            if batch > 1:
+                path, payload = "/batch", {"snippets": rng.sample(corpus, min(batch, len(corpus)))}
+            else:
+                path, payload = "/analyze", {"code": rng.choice(corpus)}
+            start = time.perf_counter()
+            status = await _request(reader, writer, host, path, payload)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 503:
+                await asyncio.sleep(0.05)  # Honour the backpressure a little
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, concurrency: int, duration: float, corpus: list, batch: int) -> dict:
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(_client(host, port, corpus, batch, deadline, latencies, statuses)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requests_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "snippets_per_s": len(latencies) * max(batch, 1) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test a running O-meter service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", "-c", type=int, default=16, help="parallel connections (default: 16)")
+    parser.add_argument("--duration", "-d", type=float, default=10.0, help="seconds to run (default: 10)")
+    parser.add_argument("--snippets", type=int, default=200, help="distinct snippets in the corpus (default: 200)")
+    parser.add_argument("--lines", type=int, default=200, help="approximate lines per snippet (default: 200)")
+    parser.add_argument("--batch", type=int, default=1, help="snippets per request; >1 uses /batch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.snippets, args.lines, args.seed)
+    report = asyncio.run(run_load(args.host, args.port, args.concurrency, args.duration, corpus, args.batch))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} requests in {report['seconds']:.1f} s: "
+              f"{report['requests_per_s']:.1f} req/s ({report['snippets_per_s']:.1f} snippets/s)")
+        print(f"latency p50 {report['p50_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms, max {report['max_ms']:.1f} ms")
+        print("statuses:", ", ".join(f"{code} x{count}" for code, count in report["statuses"].items()))
+    return 0 if report["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import mmap
+from array import array
+from typing import Iterator
+
+
+class MappedSource:
+    """
+    Read-only memory map of a source file with a line-offset index.
+
+    Text is decoded lazily, one line or one slice at a time, as latin-1 so that
+    byte offsets and character offsets are the same number. Token offsets from
+    iter_tokens(source.iter_lines()) can therefore be used to slice function
+    bodies and loop headers straight out of the map, like a str:
+
+        with MappedSource("sqlite3.c") as source:
+            body = source[function.start:function.end]
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped
+            self._map = b""
+        # Start offset of every line seen so far; complete once _indexed is set
+        self._offsets = array("q", [0])
+        self._indexed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._map)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._map[key].decode("latin-1")
+        return chr(self._map[key])
+
+    def iter_lines(self, raw: bool = False) -> Iterator:
+        """
+        Yield lines with their endings, recording the line-offset index on the way.
+        With raw, the lines are the undecoded bytes, as source_key_lines() takes them.
+        """
+        data = self._map
+        offsets = self._offsets
+        record = not self._indexed
+        if record:
+            del offsets[1:]
+        start = 0
+        size = len(data)
+        while start < size:
+            end = data.find(b"\n", start)
+            end = size if end < 0 else end + 1
+            if record and end < size:
+                offsets.append(end)
+            yield data[start:end] if raw else data[start:end].decode("latin-1")
+            start = end
+        if record:
+            self._indexed = True
+
+    def _build_index(self):
+        if not self._indexed:
+            for _ in self.iter_lines():
+                pass
+
+    @property
+    def line_count(self) -> int:
+        self._build_index()
+        return len(self._offsets) if len(self._map) else 0
+
+    def line_span(self, number: int) -> tuple:
+        """(start, end) offsets of a 1-based line, end excluding the line ending"""
+        self._build_index()
+        start = self._offsets[number - 1]
+        end = self._offsets[number] if number < len(self._offsets) else len(self._map)
+        while end > start and self._map[end - 1] in (10, 13):
+            end -= 1
+        return start, end
+
+    def line(self, number: int) -> str:
+        """Text of a 1-based line without its line ending"""
+        start, end = self.line_span(number)
+        return self[start:end]
+
+    def lines(self, first: int, last: int) -> str:
+        """Text of lines first..last (1-based, inclusive)"""
+        start = self.line_span(first)[0]
+        end = self.line_span(last)[1]
+        return self[start:end]
@@ -0,0 +1,223 @@
+"""
+Optional instrumentation for the analyzers.
+
+Functions decorated with @timed and compiled patterns in instrumented modules
+only pay for a None check while profiling is off. Turn it on around a run:
+
+    with profiled(modules=[lexer, Script], cprofile=True) as profile:
+        Script.run_analyzers(code)
+    print(profile.report())
+    profile.dump_stats("ometer.prof")   # open with pstats / snakeviz
+"""
+import functools
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+# The active Profile, or None while profiling is off
+_profile = None
+
+
+class CountingPattern:
+    """Stand-in for a compiled pattern that counts every evaluation"""
+
+    def __init__(self, pattern, name: str, profile: "Profile"):
+        self._pattern = pattern
+        self._name = name
+        self._profile = profile
+
+    def _count(self):
+        regex = self._profile.regex
+        regex[self._name] = regex.get(self._name, 0) + 1
+
+    def search(self, *args, **kwargs):
+        self._count()
+        return self._pattern.search(*args, **kwargs)
+
+    def match(self, *args, **kwargs):
+        self._count()
+        return self._pattern.match(*args, **kwargs)
+
+    def fullmatch(self, *args, **kwargs):
+        self._count()
+        return self._pattern.fullmatch(*args, **kwargs)
+
+    def finditer(self, *args, **kwargs):
+        self._count()
+        return self._pattern.finditer(*args, **kwargs)
+
+    def findall(self, *args, **kwargs):
+        self._count()
+        return self._pattern.findall(*args, **kwargs)
+
+    def sub(self, *args, **kwargs):
+        self._count()
+        return self._pattern.sub(*args, **kwargs)
+
+    def subn(self, *args, **kwargs):
+        self._count()
+        return self._pattern.subn(*args, **kwargs)
+
+    def split(self, *args, **kwargs):
+        self._count()
+        return self._pattern.split(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self._pattern, attr)
+
+
+class Profile:
+    """Everything recorded while profiling was on"""
+
+    def __init__(self, cprofile: bool = False):
+        self.timings = {}   # name -> [calls, total seconds, max seconds]
+        self.counters = {}  # name -> count
+        self.regex = {}     # pattern name -> evaluations
+        self._patched = []  # (module, attribute, original pattern)
+        self._cprofile = None
+        if cprofile:
+            import cProfile  # Only loaded when a pstats dump is wanted
+            self._cprofile = cProfile.Profile()
+
+    def add_time(self, name: str, seconds: float):
+        entry = self.timings.get(name)
+        if entry is None:
+            self.timings[name] = [1, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def instrument(self, module):
+        """Count evaluations of every compiled pattern defined at module level"""
+        for attr, value in list(vars(module).items()):
+            if hasattr(value, "pattern") and hasattr(value, "search") and not isinstance(value, CountingPattern):
+                name = f"{module.__name__}.{attr}"
+                self._patched.append((module, attr, value))
+                setattr(module, attr, CountingPattern(value, name, self))
+
+    def restore(self):
+        for module, attr, original in reversed(self._patched):
+            setattr(module, attr, original)
+        self._patched.clear()
+
+    def report(self) -> dict:
+        return {
+            "timings": {
+                name: {"calls": calls, "total_s": round(total, 6), "max_s": round(longest, 6)}
+                for name, (calls, total, longest) in sorted(self.timings.items(), key=lambda item: -item[1][1])
+            },
+            "regex_evaluations": dict(sorted(self.regex.items(), key=lambda item: -item[1])),
+            "counters": dict(self.counters),
+        }
+
+    def dump_stats(self, path: str):
+        """Write the cProfile data in pstats format"""
+        if self._cprofile is None:
+            raise RuntimeError("profiling was enabled without cprofile=True")
+        self._cprofile.dump_stats(path)
+
+
+def current() -> Optional[Profile]:
+    """The active Profile, or None when profiling is off"""
+    return _profile
+
+
+def enable(modules=(), cprofile: bool = False) -> Profile:
+    """Start recording; patterns in the given modules are counted too"""
+    global _profile
+    if _profile is not None:
+        disable()
+    profile = Profile(cprofile)
+    for module in modules:
+        profile.instrument(module)
+    if profile._cprofile is not None:
+        profile._cprofile.enable()
+    _profile = profile
+    return profile
+
+
+def disable() -> Optional[Profile]:
+    """Stop recording and put the original patterns back"""
+    global _profile
+    profile = _profile
+    _profile = None
+    if profile is not None:
+        if profile._cprofile is not None:
+            profile._cprofile.disable()
+        profile.restore()
+    return profile
+
+
+def timed_iter(name: str, transform, items):
+    """
+    transform(items) for a lazy, item-by-item generator such as lexer.blank_lines(),
+    recording the time spent in the generator itself (not in items) while profiling is on
+    """
+    profile = _profile
+    if profile is None:
+        return transform(items)
+    return _timed_iter(profile, name, transform, items)
+
+
+def _timed_iter(profile: Profile, name: str, transform, items):
+    upstream = 0.0  # Time spent producing items, taken out of the total
+
+    def source():
+        nonlocal upstream
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                upstream += time.perf_counter() - start
+                return
+            upstream += time.perf_counter() - start
+            yield item
+
+    total = 0.0
+    results = transform(source())
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                result = next(results)
+            except StopIteration:
+                total += time.perf_counter() - start
+                return
+            total += time.perf_counter() - start
+            yield result
+    finally:
+        profile.add_time(name, total - upstream)
+
+
+@contextmanager
+def profiled(modules=(), cprofile: bool = False):
+    profile = enable(modules, cprofile)
+    try:
+        yield profile
+    finally:
+        disable()
+
+
+def timed(name: str):
+    """Record wall time and call count of the decorated function while profiling is on"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = _profile
+            if profile is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.add_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,188 @@
+"""
+Project mode: whole translation units instead of single files.
+
+Starting from the entry files, local `#include "..."` directives are followed
+(relative to the including file, then the -I directories). Every file reached
+is scanned exactly once, however many translation units include it; each unit
+then joins the call-graph summaries of itself and everything it includes, so a
+loop in main.c calling a linear helper from util.h costs O(N^2):
+
+    python Script.py src/*.c --project -I include/
+
+System headers (`#include <...>`) and quoted includes that cannot be found are
+skipped; the latter are listed per unit under "unresolved". Includes inside
+comments or `#if 0` blocks are not followed.
+"""
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional
+
+import callgraph
+import ir
+from core import cost_complexity
+from lexer import blank
+
+
+# Local includes only; <...> headers are library code that costs nothing here
+INCLUDE_RE = re.compile(r'^[ \t]*#[ \t]*include[ \t]*"([^"\n]+)"', re.MULTILINE)
+
+# Conditional directives, to leave out the includes of #if 0 blocks
+CONDITIONAL_RE = re.compile(r'[ \t]*#[ \t]*(if|ifdef|ifndef|elif|else|endif)\b(.*)')
+
+
+def _is_zero(condition: str) -> bool:
+    """Whether a #if/#elif condition is the literal 0, comments aside"""
+    return condition.split("//")[0].split("/*")[0].strip() == "0"
+
+
+def includes(directives: Iterable[str]) -> List[str]:
+    """
+    Names of the quoted includes among preprocessor lines, as collected by
+    lexer.blank(code, directives), in order. Those of #if 0 blocks are left out;
+    any other condition may hold, so both of its branches are followed.
+    """
+    names = []
+    dead = 0  # Conditionals open since the #if 0 being skipped, 0 when not skipping
+    for line in directives:
+        conditional = CONDITIONAL_RE.match(line)
+        if conditional is not None:
+            kind, condition = conditional.groups()
+            if kind.startswith("if"):
+                if dead:
+                    dead += 1
+                elif kind == "if" and _is_zero(condition):
+                    dead = 1
+            elif kind == "endif":
+                dead = max(dead - 1, 0)
+            elif dead <= 1:
+                # #else or #elif of the skipped block, or #elif 0 after a live branch
+                dead = 1 if kind == "elif" and _is_zero(condition) else 0
+            continue
+        if not dead:
+            names.extend(INCLUDE_RE.findall(line))
+    return names
+
+
+def resolve(name: str, from_dir: str, include_dirs: Iterable[str] = ()) -> Optional[str]:
+    """Normalized path of an included file, or None when it cannot be found"""
+    for directory in (from_dir, *include_dirs):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return os.path.normpath(path)
+    return None
+
+
+def summarize(code: str, blanked: str) -> Dict[str, callgraph.Summary]:
+    """Call-graph summaries of a source, blanked being lexer.blank(code)"""
+    return ir.build(code, blanked).summaries()
+
+
+def scan_file(path: str, include_dirs: Iterable[str] = (),
+              summaries: Callable[[str, str], Dict[str, callgraph.Summary]] = summarize) -> dict:
+    """
+    Worker: summaries and resolved includes of one file.
+    The result is what gets shared by every unit including the file.
+    summaries(code, blanked) gives the summaries, e.g. from a result cache.
+    """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            code = f.read()
+    except OSError as e:
+        return {"path": path, "error": str(e)}
+    directives = []
+    blanked = blank(code, directives)  # One pass for the includes and the summaries
+    from_dir = os.path.dirname(path)
+    resolved, unresolved = [], []
+    for name in includes(directives):
+        target = resolve(name, from_dir, include_dirs)
+        if target is None:
+            unresolved.append(name)
+        elif target not in resolved:
+            resolved.append(target)
+    return {"path": path, "includes": resolved, "unresolved": unresolved,
+            "summaries": summaries(code, blanked)}
+
+
+def scan(entries: Iterable[str], analyze: Callable[[List[str]], Iterable[dict]]) -> Dict[str, dict]:
+    """
+    scan_file() results of the entries and every file they include, keyed by path.
+    analyze(paths) scans a batch of files; files are handed over in waves, each
+    wave holding the includes first seen in the previous one, so no file is
+    scanned twice.
+    """
+    scanned = {}
+    wave = []
+    for path in entries:
+        path = os.path.normpath(path)
+        if path not in wave:
+            wave.append(path)
+    seen = set(wave)
+    while wave:
+        found = []
+        for result in analyze(wave):
+            scanned[result["path"]] = result
+            for target in result.get("includes", ()):
+                if target not in seen:
+                    seen.add(target)
+                    found.append(target)
+        wave = found
+    return scanned
+
+
+def closure(path: str, scanned: Dict[str, dict]) -> List[str]:
+    """path and every file it includes, directly or not, in include order"""
+    order = []
+    seen = {path}
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        order.append(current)
+        # Reversed so the first include is visited first
+        for target in reversed(scanned[current].get("includes", ())):
+            if target not in seen and target in scanned:
+                seen.add(target)
+                stack.append(target)
+    return order
+
+
+def unit_summaries(files: List[str], scanned: Dict[str, dict]) -> Dict[str, callgraph.Summary]:
+    """Summaries of one translation unit; the first definition of a name wins, as within a file"""
+    summaries = {}
+    top = callgraph.Summary((0, 0), {})
+    for path in files:
+        for name, summary in scanned[path].get("summaries", {}).items():
+            if name == callgraph.TOP_LEVEL:
+                top = callgraph.merge_summaries(top, summary)
+            elif name not in summaries:
+                summaries[name] = summary
+    summaries[callgraph.TOP_LEVEL] = top
+    return summaries
+
+
+def unit_result(path: str, scanned: Dict[str, dict]) -> dict:
+    """
+    Worst-case complexity of one translation unit: the costliest function or
+    top-level code of the entry file itself, with the costs of callees from
+    its headers composed in. Header functions the unit never calls do not count.
+    """
+    entry = scanned[path]
+    if "error" in entry:
+        return {"path": path, "error": entry["error"]}
+    files = closure(path, scanned)
+    costs = callgraph.propagate(unit_summaries(files, scanned))
+    # The entry file comes first in the unit, so all of its definitions are the ones costed
+    worst = max(entry["summaries"], key=lambda name: costs[name])
+    cost = costs[worst]
+    unresolved = sorted({name for f in files for name in scanned[f].get("unresolved", ())})
+    result = {"path": path, "complexity": cost_complexity(cost), "cost": list(cost),
+              "function": worst, "includes": files[1:]}
+    if unresolved:
+        result["unresolved"] = unresolved
+    return result
+
+
+def run(entries: List[str], analyze: Callable[[List[str]], Iterable[dict]]) -> Iterable[dict]:
+    """unit_result() of every entry, in entry order, scanning each file once"""
+    scanned = scan(entries, analyze)
+    for path in dict.fromkeys(os.path.normpath(path) for path in entries):
+        yield unit_result(path, scanned)
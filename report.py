@@ -0,0 +1,126 @@
+"""
+Hotspot report: every function and every outermost loop nest with its line
+range, nesting, log factors, recursion class and estimated cost (callees
+included), costliest first.
+
+    python Script.py --report < file.c
+    python Script.py src/ --report json
+
+Items are collected per source (or per block in the web app) with relative line
+numbers, then resolved once the call-graph costs of the whole input are known.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Dict, List
+
+import callgraph
+import ir
+
+
+def _line_starts(code: str) -> list:
+    starts = [0]
+    find = code.find
+    pos = find("\n")
+    while pos >= 0:
+        starts.append(pos + 1)
+        pos = find("\n", pos + 1)
+    return starts
+
+
+def collect(code: str, program: ir.Program) -> List[dict]:
+    """Unresolved report items of one source; lines are 1-based within code"""
+    index, top_calls, summaries = program.functions, program.top_calls, program.summaries()
+    line_starts = _line_starts(code)
+    items = []
+    spans = []  # (start, end, name) of every indexed function, in source order
+    for name, function in index.items():
+        items.append({
+            "kind": "function",
+            "name": name,
+            "function": name,
+            "start_line": function.line,
+            "end_line": bisect_right(line_starts, function.end),
+            "nest": list(summaries[name].own),
+        })
+        spans.append((function.start, function.end, name))
+    spans.sort()
+    span_starts = [span[0] for span in spans]
+
+    # Outermost loops are the nests; each is costed with the calls made inside it
+    loops = sorted(program.loops, key=lambda loop: loop.start)
+    loop_starts = [loop.start for loop in loops]
+    sorted_calls = {}  # owner -> (calls by offset, their offsets)
+    outer_end = -1
+    for loop in loops:
+        if loop.start < outer_end:
+            continue
+        outer_end = loop.end
+        at = bisect_right(span_starts, loop.start) - 1
+        owner = spans[at][2] if at >= 0 and loop.start < spans[at][1] else None
+        if owner not in sorted_calls:
+            calls = sorted(index[owner].calls if owner is not None else top_calls, key=lambda call: call.start)
+            sorted_calls[owner] = (calls, [call.start for call in calls])
+        calls, call_starts = sorted_calls[owner]
+        scope = callgraph.summarize(
+            calls[bisect_left(call_starts, loop.start):bisect_right(call_starts, loop.end)],
+            loops[bisect_left(loop_starts, loop.start):bisect_right(loop_starts, loop.end)])
+        items.append({
+            "kind": "loop",
+            "name": loop.kind,
+            "function": owner,
+            "start_line": loop.line,
+            "end_line": loop.end_line,
+            "nest": [loop.linear, loop.logs],
+            "scope": scope,
+        })
+    return items
+
+
+def resolve(items: List[dict], summaries: Dict[str, callgraph.Summary]) -> List[dict]:
+    """Final report entries, costliest first, from collected items and the summaries of the whole input"""
+    from core import cost_complexity  # Imported late: core imports this module
+
+    recursion = {}
+    costs = callgraph.propagate(summaries, recursion=recursion)
+    entries = []
+    for item in items:
+        if item["kind"] == "function":
+            cost = costs.get(item["name"], callgraph.ZERO)
+            kind = recursion.get(item["name"])
+        else:
+            cost = callgraph.scope_cost(item["scope"], costs)
+            kind = None
+        linear, logs = item["nest"]
+        entries.append({
+            "kind": item["kind"],
+            "name": item["name"],
+            "function": item["function"],
+            "start_line": item["start_line"],
+            "end_line": item["end_line"],
+            "depth": linear + logs,
+            "log_factors": logs,
+            "recursion": callgraph.RECURSION[kind] if kind else None,
+            "complexity": cost_complexity(cost),
+            "cost": list(cost),
+        })
+    # Costliest first; among equals the larger region, then source order
+    entries.sort(key=lambda e: (tuple(-part for part in e["cost"]),
+                                e["start_line"] - e["end_line"], e["start_line"]))
+    return entries
+
+
+def hotspots(code: str, program: ir.Program = None) -> List[dict]:
+    """Report entries for one whole source"""
+    if program is None:
+        program = ir.build(code)
+    return resolve(collect(code, program), program.summaries())
+
+
+def format_table(entries: List[dict]) -> str:
+    """Plain-text table of report entries"""
+    rows = [("COMPLEXITY", "KIND", "NAME", "LINES", "DEPTH", "LOGS", "RECURSION")]
+    for e in entries:
+        name = e["name"] if e["kind"] == "function" else f"{e['name']} in {e['function'] or '<top level>'}"
+        rows.append((e["complexity"], e["kind"], name, f"{e['start_line']}-{e['end_line']}",
+                     str(e["depth"]), str(e["log_factors"]), e["recursion"] or "-"))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
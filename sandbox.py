@@ -0,0 +1,254 @@
+"""
+Pre-forked analysis workers with per-request time and memory budgets.
+
+The hosted web app runs every analysis through a SandboxPool so that one
+pathological paste cannot hold a Streamlit thread (and the GIL) for minutes:
+
+    pool = SandboxPool(core.analyze_chunk)
+    try:
+        results = pool.run(blocks, cancelled)  # None once cancelled() turns True
+    except BudgetExceeded:
+        ...  # tell the user, everyone else is still being served
+
+Each worker process has an address-space limit and a CPU-time itimer armed for
+every request. The parent also waits at most wall_timeout for a reply and kills
+workers that do not answer, since a long regex match in C never gives the
+signal handler a chance to run. Workers are replaced after max_requests
+requests, and after any request that blew its budget, or that was abandoned
+by its caller while running.
+"""
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from typing import Callable
+
+
+# Message every budget failure starts with, shown as-is in the app
+BUDGET_EXCEEDED = "analysis budget exceeded"
+
+DEFAULT_WORKERS = 2
+DEFAULT_CPU_SECONDS = 5.0
+DEFAULT_MEMORY_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_REQUESTS = 200
+
+# How often a waiting run() checks whether its caller gave up
+POLL_INTERVAL = 0.05
+
+
+class BudgetExceeded(Exception):
+    """A request ran out of CPU time, memory or wall time"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"{BUDGET_EXCEEDED} ({reason})")
+        self.reason = reason
+
+
+class SandboxError(Exception):
+    """The analysis itself raised; the message carries the worker's exception"""
+
+
+def _limit_memory(memory_bytes: int):
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return
+    # The budget comes on top of what the interpreter has mapped already
+    base = 0
+    try:
+        with open("/proc/self/statm") as f:
+            base = int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError):
+        pass
+    limit = base + memory_bytes
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _on_cpu_budget(signum, frame):
+    raise BudgetExceeded("cpu time")
+
+
+def _serve(conn, func, cpu_seconds: float, memory_bytes: int):
+    """Worker loop: answer (status, payload) for every request received until None or EOF"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is for the parent to handle
+    _limit_memory(memory_bytes)
+    timer = hasattr(signal, "setitimer")
+    if timer:
+        signal.signal(signal.SIGPROF, _on_cpu_budget)
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+
+        try:
+            if timer:
+                # ITIMER_PROF counts user and system CPU time of this process only
+                signal.setitimer(signal.ITIMER_PROF, cpu_seconds)
+            try:
+                reply = ("ok", func(request))
+            finally:
+                if timer:
+                    signal.setitimer(signal.ITIMER_PROF, 0)
+        except BudgetExceeded as e:
+            reply = ("budget", e.reason)
+        except MemoryError:
+            reply = ("budget", "memory")
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+
+        try:
+            conn.send(reply)
+        except (OSError, MemoryError):
+            return
+
+
+class _Worker:
+    def __init__(self, context, func, cpu_seconds: float, memory_bytes: int):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, func, cpu_seconds, memory_bytes),
+                                       name="ometer-sandbox", daemon=True)
+        self.process.start()
+        child.close()
+        self.requests = 0
+
+    def stop(self, timeout: float = 1.0):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class SandboxPool:
+    """
+    A fixed number of worker processes, each running func(request) for one request
+    at a time. run() is thread-safe and blocks while every worker is busy.
+    func must be picklable (a module-level function or a partial of one).
+    """
+
+    def __init__(self, func: Callable[[str], object], workers: int = DEFAULT_WORKERS,
+                 cpu_seconds: float = DEFAULT_CPU_SECONDS, memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 max_requests: int = DEFAULT_MAX_REQUESTS, wall_timeout: float = None):
+        self.func = func
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.max_requests = max_requests
+        # CPU time can lag wall time under load; leave room before killing a worker
+        self.wall_timeout = wall_timeout if wall_timeout is not None else 2 * cpu_seconds + 1
+        # Workers are started from a clean server process, never forked from a threaded parent
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._idle = queue.Queue()
+        self._all = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._context, self.func, self.cpu_seconds, self.memory_bytes)
+        with self._lock:
+            self._all.add(worker)
+        return worker
+
+    def _retire(self, worker: _Worker, kill: bool = False) -> _Worker:
+        with self._lock:
+            self._all.discard(worker)
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+        return self._spawn()
+
+    def _acquire(self, cancelled) -> _Worker:
+        """An idle worker, or None once cancelled() returns True"""
+        if cancelled is None:
+            return self._idle.get()
+        while not cancelled():
+            try:
+                return self._idle.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return None
+
+    def _reply_ready(self, worker: _Worker, cancelled) -> bool:
+        """Wait up to wall_timeout for the reply; False on timeout or once cancelled() returns True"""
+        if cancelled is None:
+            return worker.conn.poll(self.wall_timeout)
+        deadline = time.monotonic() + self.wall_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or cancelled():
+                return False
+            if worker.conn.poll(min(POLL_INTERVAL, remaining)):
+                return True
+
+    def run(self, request, cancelled=None):
+        """
+        func(request) in a worker; raises BudgetExceeded or SandboxError instead of hanging.
+        cancelled() is polled while waiting; once it returns True, run() gives up and
+        returns None, killing and replacing the worker if the request was already running.
+        """
+        if self._closed:
+            raise RuntimeError("sandbox pool is closed")
+        worker = self._acquire(cancelled)
+        if worker is None:
+            return None
+        try:
+            try:
+                worker.conn.send(request)
+                if not self._reply_ready(worker, cancelled):
+                    abandoned = cancelled is not None and cancelled()
+                    worker = self._retire(worker, kill=True)
+                    if abandoned:
+                        return None  # A newer request wants the worker more
+                    raise BudgetExceeded("wall time")
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                # Killed by the kernel, typically for memory it could not get
+                worker = self._retire(worker, kill=True)
+                raise BudgetExceeded("worker died")
+
+            worker.requests += 1
+            if status == "budget":
+                # Whatever the failed request left behind is not worth keeping
+                worker = self._retire(worker)
+                raise BudgetExceeded(payload)
+            if worker.requests >= self.max_requests:
+                worker = self._retire(worker)
+            if status == "error":
+                raise SandboxError(payload)
+            return payload
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._all)
+            self._all.clear()
+        for worker in workers:
+            worker.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,267 @@
+"""
+Local HTTP/JSON analysis service.
+
+An asyncio front end parses requests and answers from the result cache; misses
+go through a bounded queue to a process pool running the analyzers. When the
+queue is full the service answers 503 right away instead of piling up work; a
+batch that could never fit in the queue gets 413 with the limit.
+Standard library only, so it runs fully offline:
+
+    python service.py --port 8765 --workers 4
+
+    POST /analyze  {"code": "..."}                -> {"complexity": ..., "analyzers": {...}}
+    POST /batch    {"snippets": ["...", "..."]}   -> {"results": [{...}, ...]}
+    GET  /health                                  -> {"status": "ok", "queued": ..., ...}
+
+Results have the same shape as Script.py's batch output (minus "path").
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import json
+import os
+import sys
+
+from cache import ResultCache, source_key
+
+
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE = 256                    # Snippets waiting for a worker before 503
+MAX_BODY_BYTES = 16 * 1024 * 1024     # Larger requests get 413
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def analyze_snippet(code: str) -> dict:
+    """Pool worker: run_analyzers() with the recursion findings kept off stdout"""
+    import core  # Imported in the worker, the front end never needs it
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return core.run_analyzers(code)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AnalysisService:
+    """Queue, dispatchers and process pool behind the HTTP handlers"""
+
+    def __init__(self, workers: int, queue_size: int = DEFAULT_QUEUE, cache_path: str = None):
+        self.workers = workers
+        self.cache = ResultCache(path=cache_path)
+        self.queue = asyncio.Queue(queue_size)
+        self.pool = concurrent.futures.ProcessPoolExecutor(workers)
+        self.served = 0
+        self.rejected = 0
+        self._dispatchers = []
+
+    async def start(self):
+        # One dispatcher per worker keeps exactly `workers` snippets in the pool
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self.pool.shutdown(cancel_futures=True)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            code, key, future = await self.queue.get()
+            try:
+                if not future.cancelled():
+                    result = await loop.run_in_executor(self.pool, analyze_snippet, code)
+                    await self._cache_io(self.cache.put, key, result)
+                    if not future.cancelled():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def _cache_io(self, func, *args):
+        """func(*args) on a thread when the cache has a SQLite tier, so disk I/O never blocks the loop"""
+        if self.cache.path is None:
+            return func(*args)  # Memory only: cheaper than a thread hop
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _lookup(self, snippets) -> list:
+        """(key, cached result or None) of every snippet"""
+        return [(key, self.cache.get(key)) for key in map(source_key, snippets)]
+
+    async def analyze_many(self, snippets) -> list:
+        """Results for every snippet, cache hits first; all or nothing when the queue is full"""
+        loop = asyncio.get_running_loop()
+        results = [None] * len(snippets)
+        misses = []
+        for i, (key, cached) in enumerate(await self._cache_io(self._lookup, snippets)):
+            if cached is None:
+                misses.append((i, snippets[i], key))
+            else:
+                results[i] = cached
+
+        if len(misses) > self.queue.maxsize:
+            # Could never fit, however long the client retries
+            raise HTTPError(413, f"{len(misses)} snippets need analysis but at most {self.queue.maxsize} "
+                                 f"fit in the queue; split the batch")
+        # Backpressure: reject the whole request rather than queue part of it
+        if self.queue.maxsize - self.queue.qsize() < len(misses):
+            self.rejected += 1
+            raise HTTPError(503, "analysis queue is full, retry later")
+
+        futures = []
+        for i, code, key in misses:
+            future = loop.create_future()
+            self.queue.put_nowait((code, key, future))
+            futures.append((i, future))
+        try:
+            for i, future in futures:
+                results[i] = await future
+        finally:
+            for _, future in futures:
+                future.cancel()  # Client went away: drop what has not started yet
+        self.served += len(snippets)
+        return results
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "served": self.served,
+            "rejected": self.rejected,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
+
+
+def _snippets(payload, field: str, many: bool) -> list:
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "request body must be a JSON object")
+    value = payload.get(field)
+    if many:
+        if not isinstance(value, list) or not all(isinstance(code, str) for code in value):
+            raise HTTPError(400, f'"{field}" must be a list of strings')
+        return value
+    if not isinstance(value, str):
+        raise HTTPError(400, f'"{field}" must be a string')
+    return [value]
+
+
+async def handle(service: AnalysisService, method: str, path: str, body: bytes):
+    """(status, JSON-serializable payload) for one request"""
+    if path == "/health":
+        if method != "GET":
+            raise HTTPError(405, "use GET")
+        return 200, service.health()
+    if path not in ("/analyze", "/batch"):
+        raise HTTPError(404, f"no such endpoint: {path}")
+    if method != "POST":
+        raise HTTPError(405, "use POST")
+    try:
+        payload = json.loads(body or b"null")
+    except ValueError as e:
+        raise HTTPError(400, f"invalid JSON: {e}")
+
+    if path == "/analyze":
+        results = await service.analyze_many(_snippets(payload, "code", many=False))
+        return 200, results[0]
+    results = await service.analyze_many(_snippets(payload, "snippets", many=True))
+    return 200, {"results": results}
+
+
+async def serve_connection(service: AnalysisService, reader, writer):
+    """HTTP/1.1 with keep-alive, just enough for JSON clients"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            try:
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    raise HTTPError(413, f"request body over {MAX_BODY_BYTES} bytes")
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await handle(service, method.upper(), target.split("?")[0], body)
+            except HTTPError as e:
+                status, payload = e.status, {"error": str(e)}
+                keep_alive = keep_alive and e.status != 413  # Unread body would desync the stream
+            except ValueError:
+                status, payload, keep_alive = 400, {"error": "bad Content-Length"}, False
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+            data = json.dumps(payload).encode()
+            head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                    "Content-Type: application/json",
+                    f"Content-Length: {len(data)}",
+                    "Connection: " + ("keep-alive" if keep_alive else "close")]
+            if status == 503:
+                head.append("Retry-After: 1")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+        with contextlib.suppress(Exception):
+            await writer.wait_closed()
+
+
+async def run_service(host: str, port: int, workers: int, queue_size: int, cache_path: str = None):
+    service = AnalysisService(workers, queue_size, cache_path)
+    await service.start()
+    server = await asyncio.start_server(lambda r, w: serve_connection(service, r, w), host, port)
+    address = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"O-meter service on {address} with {workers} workers, queue {queue_size}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    from core import available_cores  # Only for the default pool size
+
+    parser = argparse.ArgumentParser(description="Serve O-meter analyses over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="analyzer processes (default: available cores)")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE,
+                        help=f"snippets allowed to wait for a worker before answering 503 (default: {DEFAULT_QUEUE})")
+    parser.add_argument("--cache", metavar="PATH", default=None,
+                        help="SQLite file that keeps results between runs, keyed by source hash")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(run_service(args.host, args.port, args.workers or available_cores(), args.queue, args.cache))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
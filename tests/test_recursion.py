@@ -0,0 +1,59 @@
+"""
+Recursion-in-loop detection: the structural scan must stay linear on inputs
+that made the old backtracking regex hang, and must only count calls that
+really sit inside a loop body.
+"""
+import time
+
+import pytest
+
+from core import analyze_recursion
+
+
+# Generous: the scan takes well under a second here, the old regex minutes
+TIME_BOUND = 5.0
+
+
+def recursion(code: str) -> str:
+    return analyze_recursion(code, log=lambda *args: None)
+
+
+def test_many_loop_headers_then_recursive_call_is_linear():
+    # 20k for headers without a match inside any loop, then one call after them
+    body = "    for (i = 0; i < n; i++) x++;\n" * 20000
+    code = "int f(int n) {\n    int i, x = 0;\n" + body + "    return f(n - 1);\n}\n"
+    start = time.perf_counter()
+    result = recursion(code)
+    elapsed = time.perf_counter() - start
+    assert result == "O(N)"
+    assert elapsed < TIME_BOUND, f"took {elapsed:.2f}s"
+
+
+def test_unclosed_loop_headers_are_linear():
+    # Headers that never get a body used to make the regex retry from every one
+    code = "int f(int n) {\n" + "for (i = 0; i < n; i++ {\n" * 20000 + "f(n - 1);\n"
+    start = time.perf_counter()
+    recursion(code)
+    elapsed = time.perf_counter() - start
+    assert elapsed < TIME_BOUND, f"took {elapsed:.2f}s"
+
+
+@pytest.mark.parametrize("code", [
+    "int f(int n) { while (n > 0) { f(n - 1); n--; } return 0; }",
+    "int f(int n) { do { f(n - 1); n--; } while (n > 0); return 0; }",
+    "int f(int n) { for (int i = 0; i < n; i++) f(n - 1); return 0; }",
+    "int f(int n) { for (int i = 0; i < n; i++) { if (i % 2) { f(n - 1); } } return 0; }",
+    "int f(int n) { for (int i = 0; i < n; i++) { for (int j = 0; j < i; j++) f(j); } return 0; }",
+])
+def test_call_inside_loop_is_factorial(code):
+    assert recursion(code) == "O(N!)"
+
+
+@pytest.mark.parametrize("code, expected", [
+    ("int f(int n) { for (int i = 0; i < n; i++) { n--; } return f(n - 1); }", "O(N)"),
+    ("int f(int n) { while (n > 10) n /= 2; return f(n - 1) + f(n - 2); }", "O(2^N)"),
+    ("int f(int n) { for (int i = 0; i < n; i++); f(n - 1); return 0; }", "O(N)"),
+    ("int f(int n) { /* for (;;) { f(n); } */ return n ? f(n - 1) : 0; }", "O(N)"),
+])
+def test_call_after_loop_is_not_inside_it(code, expected):
+    assert recursion(code) == expected
@@ -0,0 +1,354 @@
+"""
+Empirical complexity check: compile the snippet, time it, fit the timings.
+
+The snippet is wrapped in a generated harness and built with the local C (or C++)
+compiler. The harness runs one function, or the whole snippet as the body of a
+function of `long n`, for a geometric series of N and reports the time per call.
+The timings are then fitted against the growth curve of every class in
+COMPLEXITY_ORDER at once with NumPy least squares, and the class that explains
+them best is the measured complexity:
+
+    python Script.py --verify < file.c            # costliest function that can be called
+    python Script.py --verify merge_sort < file.c
+
+Parameters are filled from their type and name: integers get N (0 for names such
+as lo/left/start, N-1 for hi/right/end), pointers, arrays, vectors and strings get
+N pseudo-random elements. This runs the code being analyzed on this machine, so
+it is never offered by the sandboxed web app. POSIX only (clock_gettime).
+"""
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from core import COMPLEXITY_ORDER, growth_curves
+import ir
+from report import hotspots
+
+
+DEFAULT_BUDGET = 10.0      # Seconds for the whole series
+MIN_POINTS = 4             # Fewer timings than this cannot be fitted
+MAX_N = 1 << 24
+N_RATIO = math.sqrt(2)     # Geometric step between consecutive N
+MIN_SAMPLE_SECONDS = 0.001  # Each round repeats the call at least this long
+ROUNDS = 5                 # Rounds per point; the fastest one is kept
+TOLERANCE = 0.02           # Simpler classes win unless the best fit has this much less relative error
+
+# The pseudo-function standing for a snippet without function definitions
+SNIPPET = "<snippet>"
+
+CPP_RE = re.compile(r'std::|\busing\s+namespace\b|\btemplate\s*<|\bvector\s*<|\bstring\b|\bcout\b|\bcin\b'
+                    r'|\bclass\s+\w+|\bnew\s+\w|#\s*include\s*<\w+>|\w\s*&\s*\w+\s*[,)]')
+SCALAR = r'(?:(?:unsigned|signed|long|short|int|char|float|double|bool|size_t|u?int(?:8|16|32|64)_t)\b\s*)+'
+SCALAR_RE = re.compile(rf'^(?:const\s+)?({SCALAR})\s*(&?)\s*(\w+)$')
+POINTER_RE = re.compile(rf'^(?:const\s+)?({SCALAR})\s*\*\s*(?:const\s+)?(\w+)$')
+ARRAY_RE = re.compile(rf'^(?:const\s+)?({SCALAR})\s*(\w+)\s*\[\s*\w*\s*\]$')
+VECTOR_RE = re.compile(rf'^(?:const\s+)?(?:std::)?vector\s*<\s*({SCALAR})\s*>\s*&?\s*(\w+)$')
+STRING_RE = re.compile(r'^(?:const\s+)?(?:std::)?string\s*&?\s*(\w+)$')
+
+LOW_NAMES = {"l", "lo", "low", "left", "start", "begin", "first", "from"}
+HIGH_NAMES = {"r", "hi", "high", "right", "end", "last", "to"}
+
+C_PRELUDE = """#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+"""
+CPP_PRELUDE = C_PRELUDE + """#include <algorithm>
+#include <iostream>
+#include <map>
+#include <queue>
+#include <set>
+#include <stack>
+#include <string>
+#include <unordered_map>
+#include <unordered_set>
+#include <vector>
+"""
+
+HARNESS_MAIN = """
+static unsigned long long ometer_seed;
+
+static long ometer_next(long bound) {
+    ometer_seed = ometer_seed * 6364136223846793005ULL + 1442695040888963407ULL;
+    return bound > 0 ? (long)((ometer_seed >> 33) %% (unsigned long long)bound) : 0;
+}
+
+static double ometer_now(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec + ts.tv_nsec * 1e-9;
+}
+
+int main(int argc, char **argv) {
+    long n = atol(argv[1]);
+    double min_seconds = atof(argv[2]);
+    double best = -1.0;
+    long k, r;
+    int ometer_round;
+%(declare)s
+    for (ometer_round = 0; ometer_round < %(rounds)d; ometer_round++) {
+        double total = 0.0;
+        long reps = 0, batch = 1;
+        do {
+            double start;
+            ometer_seed = 1;
+%(fill)s
+            start = ometer_now();
+            for (r = 0; r < batch; r++) {
+%(reset)s
+                %(call)s;
+            }
+            total += ometer_now() - start;
+            reps += batch;
+            /* Buffers are refilled untimed before every call; without them calls run in batches */
+            batch *= %(growth)d;
+        } while (total < min_seconds);
+        if (best < 0 || total / reps < best)
+            best = total / reps;
+        if (reps == 1)
+            break;  /* One slow call is a sample long enough */
+    }
+    printf("%%.9e\\n", best);
+    return 0;
+}
+"""
+
+
+class VerifyError(Exception):
+    """The snippet could not be built, run or fitted"""
+
+
+class Measurement(NamedTuple):
+    complexity: str            # Best fitting class
+    entry: str                 # Function that was timed, or SNIPPET
+    n_values: List[int]
+    seconds: List[float]       # Time per call at every N
+    residuals: Dict[str, float]  # Relative RMS error of every class fitted
+
+
+def is_cpp(code: str) -> bool:
+    return CPP_RE.search(code) is not None
+
+
+def find_compiler(cpp: bool) -> Optional[str]:
+    """Path of the local compiler for the language, honouring $CXX / $CC"""
+    candidates = [os.environ.get("CXX"), "c++", "g++", "clang++"] if cpp else \
+                 [os.environ.get("CC"), "cc", "gcc", "clang"]
+    for name in candidates:
+        if name and shutil.which(name):
+            return shutil.which(name)
+    return None
+
+
+def _split_params(params: str) -> List[str]:
+    """Parameters of a declaration, commas inside template arguments kept"""
+    parts, depth, current = [], 0, ""
+    for ch in params:
+        if ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += (ch in "<(") - (ch in ">)")
+        current += ch
+    parts.append(current)
+    params = [" ".join(part.split("=")[0].split()) for part in parts]
+    return [] if params in ([""], ["void"]) else params
+
+
+def _signature(code: str, start: int) -> str:
+    """Parameter list of the function whose body starts at offset start"""
+    head = code[:start - 1].rstrip()
+    head = re.sub(r'\b(?:const|noexcept|override)\s*$', "", head).rstrip()
+    if not head.endswith(")"):
+        return None
+    depth = 0
+    for i in range(len(head) - 1, -1, -1):
+        depth += (head[i] == ")") - (head[i] == "(")
+        if depth == 0:
+            return head[i + 1:-1]
+    return None
+
+
+def _argument(i: int, param: str):
+    """(declaration, untimed fill, timed reset, argument expression) for one parameter, or None"""
+    var = f"ometer_a{i}"
+    fill = f"            for (k = 0; k < n; k++) {var}[k] = (%s)ometer_next(n);"
+    letters = f"            for (k = 0; k < n; k++) {var}[k] = 'a' + ometer_next(26);"
+    m = VECTOR_RE.match(param)
+    if m:
+        return f"    std::vector<{m.group(1)}> {var};", f"            {var}.assign(n, 0);\n" + fill % m.group(1), "", var
+    m = STRING_RE.match(param)
+    if m:
+        return f"    std::string {var};", f"            {var}.assign(n, 'a');\n" + letters, "", var
+    m = POINTER_RE.match(param) or ARRAY_RE.match(param)
+    if m:
+        kind = m.group(1).strip()
+        declare = f"    {kind} *{var} = ({kind} *)malloc(sizeof({kind}) * (n + 1));"
+        if kind == "char":
+            return declare, letters + f"\n            {var}[n] = 0;", "", var
+        return declare, fill % kind, "", var
+    m = SCALAR_RE.match(param)
+    if m:
+        kind, name = m.group(1).strip(), m.group(3)
+        value = "0" if name in LOW_NAMES else "n - 1" if name in HIGH_NAMES else "n"
+        return f"    {kind} {var};", "", f"                {var} = ({kind})({value});", var
+    return None
+
+
+def _main(arguments: list, call: str) -> str:
+    fills = [a[1] for a in arguments if a[1]]
+    return HARNESS_MAIN % {
+        "declare": "\n".join(a[0] for a in arguments),
+        "fill": "\n".join(fills),
+        "reset": "\n".join(a[2] for a in arguments if a[2]),
+        "call": call,
+        "rounds": ROUNDS,
+        "growth": 1 if fills else 2,
+    }
+
+
+def build_harness(code: str, entry: str = None):
+    """(harness source, is C++, entry) for a snippet; entry defaults to its costliest callable function"""
+    program = ir.build(code)
+    index = dict(program.functions)
+    index.pop("main", None)
+    cpp = is_cpp(code)
+    prelude = CPP_PRELUDE if cpp else C_PRELUDE
+
+    if not index:
+        if entry not in (None, SNIPPET):
+            raise VerifyError(f"no function named {entry}")
+        # Statements only: they become the body of a function of n; directives stay outside
+        lines = code.splitlines()
+        directives = [line for line in lines if line.lstrip().startswith("#")]
+        body = [line for line in lines if not line.lstrip().startswith("#")]
+        source = (prelude + "\n".join(directives) + "\n\nstatic void ometer_snippet(long n) {\n"
+                  + "\n".join(body) + "\n}\n")
+        return source + _main([], "ometer_snippet(n)"), cpp, SNIPPET
+
+    if entry is not None and entry not in index:
+        raise VerifyError(f"no function named {entry}")
+    candidates = [entry] if entry else [e["name"] for e in hotspots(code, program)
+                                        if e["kind"] == "function" and e["name"] in index]
+    unsupported = []
+    for name in candidates:
+        params = _signature(code, index[name].start)
+        arguments = None if params is None else [_argument(i, p) for i, p in enumerate(_split_params(params))]
+        if arguments is None or None in arguments:
+            unsupported.append(name)
+            continue
+        call = f"{name}({', '.join(a[3] for a in arguments)})"
+        # A main() of the snippet must not clash with the harness
+        source = prelude + "#define main ometer_user_main\n" + code + "\n#undef main\n"
+        return source + _main(arguments, call), cpp, name
+    raise VerifyError("cannot generate arguments for " + ", ".join(unsupported)
+                      + " (integers, pointers, arrays, vectors and strings are supported)")
+
+
+def compile_harness(source: str, cpp: bool, workdir: str) -> str:
+    """Path of the built harness"""
+    compiler = find_compiler(cpp)
+    if compiler is None:
+        raise VerifyError(f"no {'C++' if cpp else 'C'} compiler found (set {'CXX' if cpp else 'CC'})")
+    path = os.path.join(workdir, "harness.cpp" if cpp else "harness.c")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(source)
+    binary = os.path.join(workdir, "harness")
+    # No optimization: the loops are timed as written, not as the optimizer folds them
+    command = [compiler, "-O0", "-w", "-o", binary, path] + (["-std=c++17"] if cpp else [])
+    try:
+        built = subprocess.run(command, capture_output=True, text=True, timeout=60)
+    except subprocess.TimeoutExpired:
+        raise VerifyError("compiler timed out")
+    if built.returncode != 0:
+        errors = [line for line in built.stderr.splitlines() if "error" in line][:5]
+        raise VerifyError("compilation failed:\n" + "\n".join(errors or built.stderr.splitlines()[:5]))
+    return binary
+
+
+def measure(binary: str, budget: float = DEFAULT_BUDGET):
+    """(n_values, seconds per call) along a geometric series of N until the budget runs out"""
+    n_values, seconds = [], []
+    deadline = time.monotonic() + budget
+    n = 2
+    while n <= MAX_N:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            run = subprocess.run([binary, str(n), str(MIN_SAMPLE_SECONDS)], capture_output=True,
+                                 text=True, timeout=remaining)
+        except subprocess.TimeoutExpired:
+            break
+        if run.returncode != 0:
+            if len(n_values) >= MIN_POINTS:
+                break  # Typically the stack giving out on deep recursion; what we have is enough
+            raise VerifyError(f"harness failed at N={n} with status {run.returncode}")
+        n_values.append(n)
+        seconds.append(float(run.stdout.split()[0]))
+        if seconds[-1] * N_RATIO ** 4 > remaining:
+            break  # The next point would not finish in time even for O(N^4)
+        n = max(n + 1, int(round(n * N_RATIO)))
+    if len(n_values) < MIN_POINTS:
+        raise VerifyError(f"only {len(n_values)} timings within the budget, need {MIN_POINTS}")
+    return n_values, seconds
+
+
+def fit(n_values: List[int], seconds: List[float], classes=COMPLEXITY_ORDER):
+    """
+    (best class, {class: relative RMS error}) of seconds ~ a + b * growth(N).
+    Every class is fitted at once: one weighted least-squares problem per class,
+    stacked and solved with a single batched pseudo-inverse. Only the larger half
+    of the series is fitted; at small N call overhead hides the growth.
+    """
+    try:
+        import numpy as np  # Only the measuring mode needs it
+    except ImportError:
+        raise VerifyError("numpy is needed to fit the timings (pip install numpy)")
+
+    keep = max(MIN_POINTS, len(n_values) // 2)
+    n_values, t = n_values[-keep:], np.asarray(seconds[-keep:], dtype=float)
+    curves = growth_curves(n_values, classes)
+    if "O(2^N)" in curves:
+        # Any c^N is exponential (fib is about 1.6^N): fit the base on log t, then the class as usual
+        base = max(np.polyfit(n_values, np.log(t), 1)[0], math.log(2) / 64)
+        curves["O(2^N)"] = [math.exp(min(base * n, 700.0)) if base * n < 700 else math.inf for n in n_values]
+    usable = [c for c in classes if all(math.isfinite(v) for v in curves[c])]
+    growth = np.array([curves[c] for c in usable])
+    growth /= growth.max(axis=1, keepdims=True)  # Same scale for every class
+    design = np.stack([np.ones_like(growth), growth], axis=2)  # (classes, points, [a, b])
+    # Weighting every row by 1/t makes the residuals relative errors, so the
+    # short timings count as much as the long ones
+    weighted = design / t[None, :, None]
+    coefficients = np.linalg.pinv(weighted) @ np.ones_like(t)
+    predicted = np.einsum("kmj,kj->km", weighted, coefficients)
+    rms = np.sqrt(np.mean((predicted - 1.0) ** 2, axis=1))
+    rms[(coefficients[:, 1] < 0) & (np.arange(len(usable)) > 0)] = np.inf  # Shrinking with N is no fit
+
+    residuals = {c: float(r) for c, r in zip(usable, rms)}
+    best = min(residuals.values())
+    # Ordered from simplest: the first class fitting about as well as the best one wins
+    complexity = next(c for c in usable if residuals[c] <= best + TOLERANCE)
+    return complexity, residuals
+
+
+def verify(code: str, entry: str = None, budget: float = DEFAULT_BUDGET) -> Measurement:
+    """Build, time and fit a snippet"""
+    source, cpp, entry = build_harness(code, entry)
+    with tempfile.TemporaryDirectory(prefix="ometer-") as workdir:
+        binary = compile_harness(source, cpp, workdir)
+        n_values, seconds = measure(binary, budget)
+    complexity, residuals = fit(n_values, seconds)
+    return Measurement(complexity, entry, n_values, seconds, residuals)
+
+
+def describe(measurement: Measurement) -> str:
+    """One line for the CLI"""
+    what = "the snippet" if measurement.entry == SNIPPET else f"{measurement.entry}()"
+    return (f"{measurement.complexity} (timed {what} for N = {measurement.n_values[0]}.."
+            f"{measurement.n_values[-1]}, {len(measurement.n_values)} points)")